@@ -1,17 +1,35 @@
+import os
 from pocketflow import AsyncFlow
 from .nodes import (
     HTTPDataExtractionNodeAsync,
     HTTPGenerateNodeAsync,
+    HTTPSpeculativeExtractionNodeAsync,
+    HTTPSpeculativeGenerateNodeAsync,
     HTTPSummarizerNodeAsync,
     HTTPRejectionNodeAsync,
 )
 
-def create_complaint_flow():
-    """Create and return a complaint processing flow following reference pattern."""
+# Start the 'continue' response stream while data extraction is still running
+SPECULATIVE_FLOW = os.getenv("COMPLAINT_FLOW_SPECULATIVE", "false").lower() == "true"
+
+def create_complaint_flow(speculative: bool = None):
+    """
+    Create and return a complaint processing flow following reference pattern.
+
+    Args:
+        speculative: Run extraction and response generation concurrently.
+            Defaults to the COMPLAINT_FLOW_SPECULATIVE environment variable.
+    """
+    if speculative is None:
+        speculative = SPECULATIVE_FLOW
 
     # Create nodes following reference pattern
-    extraction = HTTPDataExtractionNodeAsync()
-    generate = HTTPGenerateNodeAsync()
+    if speculative:
+        extraction = HTTPSpeculativeExtractionNodeAsync()
+        generate = HTTPSpeculativeGenerateNodeAsync()
+    else:
+        extraction = HTTPDataExtractionNodeAsync()
+        generate = HTTPGenerateNodeAsync()
     summarizer = HTTPSummarizerNodeAsync()
     rejection = HTTPRejectionNodeAsync()
 
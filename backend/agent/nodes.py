@@ -4,11 +4,10 @@ from .utils.call_llm_async import call_llm_async
 from .utils.stream_llm_async import stream_llm_async
 from .utils.save_complaint import save_complaint
 from .utils.singapore_resources import get_singapore_resources
+from .utils.category_registry import category_registry
 import json
 import asyncio
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from app.db import get_async_session, Complaint
 from app.conversations import create_conversation_with_messages
 from uuid import UUID
 import uuid
@@ -63,25 +62,8 @@ class HTTPDataExtractionNodeAsync(AsyncNode):
         if not inputs.get("complaint_topic", ""):
             to_generate_topic = True
 
-        # Get available complaint categories from database
-        try:
-            session = get_async_session()
-            session_obj = await session.__anext__()
-            # Get existing categories from complaints table
-            result = await session_obj.execute(
-                select(Complaint.category).distinct()
-            )
-            existing_categories = [row[0] for row in result if row[0]]
-            await session_obj.close()
-        except Exception as e:
-            print(f"Warning: Could not get categories from database: {e}")
-            existing_categories = []
-
-        # Default categories if none exist in database
-        categories = existing_categories if existing_categories else [
-            "transport", "housing", "healthcare", "environment",
-            "education", "employment", "security", "general"
-        ]
+        # Get available complaint categories (cached in memory, defaults if none exist yet)
+        categories = category_registry.get_categories()
 
         if missing_fields:
             categories_string = ', '.join(categories)
@@ -225,6 +207,35 @@ class HTTPDataExtractionNodeAsync(AsyncNode):
             return 'continue'
 
 
+def build_generate_messages(inputs, include_metadata=True):
+    """
+    Build the response-generation prompt from the conversation and current metadata.
+
+    Args:
+        inputs: Conversation history and complaint metadata
+        include_metadata: Whether to list the missing fields and complaint quality;
+            left out when the metadata may be stale (speculative generation)
+    """
+    metadata_section = ""
+    if include_metadata:
+        missing_fields = [key for key, value in inputs.items() if key in ['complaint_topic', 'complaint_location', 'complaint_summary'] and not value]
+        metadata_section = f"""
+            Missing Data: {', '.join(missing_fields)}
+            Complaint Quality: {inputs.get("complaint_quality", 0)}
+"""
+
+    prompt = f"""
+            You are a helpful assistant handling citizen complaints. Your job is to briefly acknowledge the complaint and ask ONE final clarifying question if absolutely necessary.
+
+            Past conversation history: {inputs['conversation_history']}
+{metadata_section}
+            If we have basic complaint information (topic, location, summary), thank the citizen and let them know their complaint will be processed. Only ask ONE more question if critical information is completely missing.
+
+            Be concise and helpful. If you ask a question, make it short and specific. Prioritize moving forward with complaint processing rather than gathering perfect information.
+            """
+    return [{"role": "user", "content": prompt}]
+
+
 class HTTPGenerateNodeAsync(AsyncNode):
     async def prep_async(self, shared):
         inputs = {
@@ -240,24 +251,13 @@ class HTTPGenerateNodeAsync(AsyncNode):
         return inputs
 
     async def exec_async(self, inputs):
-        queue = inputs.get("queue")
-
-        missing_fields = [key for key, value in inputs.items() if key in ['complaint_topic', 'complaint_location', 'complaint_summary'] and not value]
-
-        prompt = f"""
-            You are a helpful assistant handling citizen complaints. Your job is to briefly acknowledge the complaint and ask ONE final clarifying question if absolutely necessary.
-
-            Past conversation history: {inputs['conversation_history']}
-
-            Missing Data: {', '.join(missing_fields)}
-            Complaint Quality: {inputs.get("complaint_quality", 0)}
+        chunks = stream_llm_async(build_generate_messages(inputs))
+        return await self._forward_stream(chunks, inputs.get("queue"))
 
-            If we have basic complaint information (topic, location, summary), thank the citizen and let them know their complaint will be processed. Only ask ONE more question if critical information is completely missing.
-
-            Be concise and helpful. If you ask a question, make it short and specific. Prioritize moving forward with complaint processing rather than gathering perfect information.
-            """
+    async def _forward_stream(self, chunks, queue):
+        """Push every chunk to the client queue, then the end-of-stream marker."""
         full_response = ""
-        async for chunk in stream_llm_async([{"role": "user", "content": prompt}]):
+        async for chunk in chunks:
             if chunk:
                 full_response += chunk
                 if queue:
@@ -271,6 +271,94 @@ class HTTPGenerateNodeAsync(AsyncNode):
         return "default"
 
 
+class SpeculativeStream:
+    """
+    Generate stream started before data extraction has finished.
+
+    Chunks are buffered in memory rather than sent to the client, so the
+    stream can still be thrown away if extraction routes the turn elsewhere.
+    """
+
+    def __init__(self, messages):
+        self.buffer = asyncio.Queue()
+        self.task = asyncio.create_task(self._produce(messages))
+
+    async def _produce(self, messages):
+        try:
+            async for chunk in stream_llm_async(messages):
+                if chunk:
+                    self.buffer.put_nowait(chunk)
+        finally:
+            self.buffer.put_nowait(None)
+
+    async def chunks(self):
+        """Yield buffered chunks first, then live ones until the stream ends."""
+        while True:
+            chunk = await self.buffer.get()
+            if chunk is None:
+                break
+            yield chunk
+        # Surface LLM errors from the background producer
+        if not self.task.cancelled() and self.task.exception():
+            raise self.task.exception()
+
+    def cancel(self):
+        self.task.cancel()
+
+
+class HTTPSpeculativeExtractionNodeAsync(HTTPDataExtractionNodeAsync):
+    """
+    Data extraction that starts the 'continue' response stream at the same time.
+
+    On 'continue' the buffered stream is handed to HTTPSpeculativeGenerateNodeAsync.
+    On 'summarize' or 'reject' (or an extraction error) it is cancelled.
+
+    The stream starts before this turn's extraction, so its prompt leaves out
+    the missing-fields and quality sections rather than report stale ones; the
+    reply is guided by the conversation alone.
+    """
+
+    async def prep_async(self, shared):
+        inputs = await super().prep_async(shared)
+        shared["speculative_stream"] = SpeculativeStream(build_generate_messages(inputs, include_metadata=False))
+        return inputs
+
+    async def _run_async(self, shared):
+        try:
+            action = await super()._run_async(shared)
+        except BaseException:
+            self._discard_speculation(shared)
+            raise
+        if action != "continue":
+            print(f"🔍 DATA EXTRACTION NODE: Discarding speculative response (action = {action})")
+            self._discard_speculation(shared)
+        return action
+
+    def _discard_speculation(self, shared):
+        stream = shared.pop("speculative_stream", None)
+        if stream:
+            stream.cancel()
+
+
+class HTTPSpeculativeGenerateNodeAsync(HTTPGenerateNodeAsync):
+    """Generate node that forwards the speculative stream instead of making a new LLM call."""
+
+    async def prep_async(self, shared):
+        inputs = await super().prep_async(shared)
+        inputs["speculative_stream"] = shared.pop("speculative_stream", None)
+        return inputs
+
+    async def exec_async(self, inputs):
+        stream = inputs.get("speculative_stream")
+        if stream is None:
+            return await super().exec_async(inputs)
+        try:
+            return await self._forward_stream(stream.chunks(), inputs.get("queue"))
+        finally:
+            # Stop the background LLM call if forwarding failed or the flow was cancelled
+            stream.cancel()
+
+
 class HTTPSummarizerNodeAsync(AsyncNode):
     async def prep_async(self, shared):
         return {
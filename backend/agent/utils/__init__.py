@@ -6,5 +6,9 @@ from .stream_llm import stream_llm
 from .stream_llm_async import stream_llm_async
 from .extract_structured_data import extract_structured_data
 from .get_embedding import get_embedding
+from .get_embedding_async import get_embedding_async, get_embeddings_async
+from .fake_embedding import fake_embedding
+from .category_registry import category_registry
+from .llm_client import get_async_client, get_sync_client, init_llm_clients, close_llm_clients
 
-__all__ = ["call_llm", "call_llm_async", "get_singapore_resources", "save_complaint", "stream_llm", "stream_llm_async", "extract_structured_data", "get_embedding"]
\ No newline at end of file
+__all__ = ["call_llm", "call_llm_async", "get_singapore_resources", "save_complaint", "stream_llm", "stream_llm_async", "extract_structured_data", "get_embedding", "get_embedding_async", "get_embeddings_async", "fake_embedding", "category_registry", "get_async_client", "get_sync_client", "init_llm_clients", "close_llm_clients"]
\ No newline at end of file
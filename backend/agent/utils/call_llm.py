@@ -1,5 +1,5 @@
 import os
-from openai import OpenAI
+from .llm_client import get_sync_client
 from typing import List, Dict
 
 def call_llm(messages: List[Dict[str, str]]) -> str:
@@ -12,13 +12,7 @@ def call_llm(messages: List[Dict[str, str]]) -> str:
     Returns:
         str: LLM response text
     """
-    client = OpenAI(
-        api_key=os.getenv("OPENAI_API_KEY"),
-        base_url=os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1"),
-        default_headers={
-            "User-Agent": "ComplainSG/1.0 (OpenAI-Compatible-Client)"
-        }
-    )
+    client = get_sync_client()
 
     response = client.chat.completions.create(
         model=os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"),
@@ -0,0 +1,83 @@
+import os
+import asyncio
+from typing import List, Optional
+
+# Fallback categories used until the database has any complaints
+DEFAULT_CATEGORIES = [
+    "transport", "housing", "healthcare", "environment",
+    "education", "employment", "security", "general"
+]
+
+
+class CategoryRegistry:
+    """
+    In-memory list of complaint categories.
+
+    Loaded from the complaints table at startup, refreshed in the background
+    every `ttl_seconds`, and updated immediately when a new category is saved,
+    so the extraction node never has to query the database.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._categories: List[str] = []
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def load(self):
+        """Reload the distinct categories from the database."""
+        # Import here to avoid circular imports
+        from app.db import async_session_maker, Complaint
+        from sqlalchemy import select
+
+        async with async_session_maker() as session:
+            result = await session.execute(select(Complaint.category).distinct())
+            categories = sorted(row[0] for row in result if row[0])
+
+        self._categories = categories
+        print(f"Loaded {len(categories)} complaint categories")
+
+    def get_categories(self) -> List[str]:
+        """
+        Get the known complaint categories.
+
+        Returns:
+            List of category names, or the defaults if none are known yet
+        """
+        return list(self._categories) if self._categories else list(DEFAULT_CATEGORIES)
+
+    def add(self, category: str):
+        """Record a category as soon as a complaint using it is saved."""
+        if category and category not in self._categories:
+            self._categories.append(category)
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.ttl_seconds)
+            try:
+                await self.load()
+            except Exception as e:
+                print(f"Warning: Could not refresh complaint categories: {e}")
+
+    async def start(self):
+        """Load categories and start the background refresh (called at application startup)."""
+        try:
+            await self.load()
+        except Exception as e:
+            print(f"Warning: Could not load complaint categories: {e}")
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        """Stop the background refresh (called at application shutdown)."""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+
+category_registry = CategoryRegistry(
+    ttl_seconds=float(os.getenv("CATEGORY_REFRESH_SECONDS", "300"))
+)
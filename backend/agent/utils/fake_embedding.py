@@ -0,0 +1,35 @@
+import hashlib
+import math
+import random
+from typing import List
+
+EMBEDDING_DIMENSIONS = 1536
+
+def fake_embedding(text: str, dimensions: int = EMBEDDING_DIMENSIONS) -> List[float]:
+    """
+    Deterministic stand-in for the embedding API, for offline runs and tests.
+
+    The same text always maps to the same unit vector; different texts map
+    to unrelated ones.
+
+    Args:
+        text: Text to embed
+        dimensions: Vector size (matches the complaints.embedding column)
+
+    Returns:
+        List of floats with unit length
+    """
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(seed)
+    vector = [rng.gauss(0.0, 1.0) for _ in range(dimensions)]
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+async def fake_embeddings_async(texts: List[str]) -> List[List[float]]:
+    """Batch version with the same signature as get_embeddings_async."""
+    return [fake_embedding(text) for text in texts]
+
+if __name__ == "__main__":
+    embedding = fake_embedding("The MRT is always delayed during peak hours")
+    print(f"Embedding dimension: {len(embedding)}")
+    print(f"First 5 values: {embedding[:5]}")
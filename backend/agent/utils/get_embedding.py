@@ -1,7 +1,13 @@
-import os
-from openai import OpenAI
+from .llm_client import get_sync_client
 from typing import List
 
+def prepare_embedding_text(text: str) -> str:
+    """Clean and truncate text before sending it to the embedding API."""
+    text = text.replace("\n", " ").strip()
+    if len(text) > 8000:  # OpenAI has token limits
+        text = text[:8000]
+    return text
+
 def get_embedding(text: str, model: str = "text-embedding-3-small") -> List[float]:
     """
     Get embedding vector for text using OpenAI's embedding API.
@@ -13,15 +19,10 @@ def get_embedding(text: str, model: str = "text-embedding-3-small") -> List[floa
     Returns:
         List of floats representing the embedding vector
     """
-    client = OpenAI(
-        api_key=os.getenv("OPENAI_API_KEY"),
-        base_url=os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
-    )
+    client = get_sync_client()
 
     # Clean and truncate text if too long
-    text = text.replace("\n", " ").strip()
-    if len(text) > 8000:  # OpenAI has token limits
-        text = text[:8000]
+    text = prepare_embedding_text(text)
 
     response = client.embeddings.create(
         input=text,
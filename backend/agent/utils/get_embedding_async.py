@@ -0,0 +1,56 @@
+from .llm_client import get_async_client
+from .get_embedding import prepare_embedding_text
+from typing import List
+
+async def get_embedding_async(text: str, model: str = "text-embedding-3-small") -> List[float]:
+    """
+    Async version of get_embedding, on the shared async client.
+
+    Args:
+        text: Text to embed
+        model: OpenAI embedding model to use
+
+    Returns:
+        List of floats representing the embedding vector
+    """
+    client = get_async_client()
+
+    # Clean and truncate text if too long
+    text = prepare_embedding_text(text)
+
+    response = await client.embeddings.create(
+        input=text,
+        model=model
+    )
+
+    return response.data[0].embedding
+
+async def get_embeddings_async(texts: List[str], model: str = "text-embedding-3-small") -> List[List[float]]:
+    """
+    Embed several texts in one API request.
+
+    Args:
+        texts: Texts to embed (the API accepts up to 2048 per request)
+        model: OpenAI embedding model to use
+
+    Returns:
+        One embedding vector per text, in the same order
+    """
+    client = get_async_client()
+
+    response = await client.embeddings.create(
+        input=[prepare_embedding_text(text) for text in texts],
+        model=model
+    )
+
+    return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+if __name__ == "__main__":
+    import asyncio
+
+    test_text = "The MRT is always delayed during peak hours"
+
+    print("Getting embedding...")
+    embedding = asyncio.run(get_embedding_async(test_text))
+    print(f"Embedding dimension: {len(embedding)}")
+    print(f"First 5 values: {embedding[:5]}")
@@ -0,0 +1,155 @@
+import os
+import asyncio
+from openai import OpenAI, AsyncOpenAI, DefaultHttpxClient, DefaultAsyncHttpxClient
+import httpx
+
+# HTTP/2 needs the optional `h2` package; without it httpx only speaks HTTP/1.1
+try:
+    import h2  # noqa: F401
+    HAS_HTTP2 = True
+except ImportError:
+    HAS_HTTP2 = False
+
+DEFAULT_HEADERS = {
+    "User-Agent": "ComplainSG/1.0 (OpenAI-Compatible-Client)"
+}
+
+# Process-wide clients, shared by every LLM and embedding utility
+_async_client = None
+_async_client_loop = None
+_sync_client = None
+# Close tasks for clients replaced by get_async_client, kept so they aren't garbage collected
+_closing_clients = set()
+
+
+def _connection_limits() -> httpx.Limits:
+    """Connection pool limits, tunable through the environment."""
+    return httpx.Limits(
+        max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20")),
+        keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY_SECONDS", "60")),
+    )
+
+
+def _use_http2() -> bool:
+    """HTTP/2 is negotiated through ALPN, so providers without it fall back to HTTP/1.1."""
+    return HAS_HTTP2 and os.getenv("LLM_HTTP2", "true").lower() == "true"
+
+
+def _client_kwargs() -> dict:
+    return {
+        "api_key": os.getenv("OPENAI_API_KEY"),
+        "base_url": os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1"),
+        "default_headers": DEFAULT_HEADERS,
+    }
+
+
+async def _close_stale_client(client: AsyncOpenAI):
+    """Close a client left behind by another event loop, releasing its pool."""
+    try:
+        await client.close()
+    except Exception as e:
+        # Sockets bound to a closed loop can't be shut down cleanly; they are dropped anyway
+        print(f"Warning: Could not close previous LLM client: {e}")
+
+
+def _retire_async_client(client: AsyncOpenAI, client_loop, loop):
+    """Close `client` on the loop that owns it if that loop is still running, else on `loop`."""
+    if client_loop is not None and client_loop.is_running() and not client_loop.is_closed():
+        asyncio.run_coroutine_threadsafe(_close_stale_client(client), client_loop)
+        return
+    task = loop.create_task(_close_stale_client(client))
+    _closing_clients.add(task)
+    task.add_done_callback(_closing_clients.discard)
+
+
+def get_async_client() -> AsyncOpenAI:
+    """
+    Get the shared AsyncOpenAI client, creating it on first use.
+
+    The underlying connection pool is bound to the event loop it was created on,
+    so a new client is built if we are called from a different loop (e.g. the
+    `asyncio.run` wrappers used by scripts and tests); the previous client is
+    closed so its connections don't leak.
+
+    Returns:
+        AsyncOpenAI: Pooled async client
+    """
+    global _async_client, _async_client_loop
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
+    if _async_client is None or (loop is not None and _async_client_loop is not loop):
+        if _async_client is not None:
+            _retire_async_client(_async_client, _async_client_loop, loop)
+        _async_client = AsyncOpenAI(
+            **_client_kwargs(),
+            http_client=DefaultAsyncHttpxClient(
+                limits=_connection_limits(),
+                http2=_use_http2(),
+            ),
+        )
+        _async_client_loop = loop
+
+    return _async_client
+
+
+def get_sync_client() -> OpenAI:
+    """
+    Get the shared synchronous OpenAI client, creating it on first use.
+
+    Returns:
+        OpenAI: Pooled sync client
+    """
+    global _sync_client
+
+    if _sync_client is None:
+        _sync_client = OpenAI(
+            **_client_kwargs(),
+            http_client=DefaultHttpxClient(
+                limits=_connection_limits(),
+                http2=_use_http2(),
+            ),
+        )
+
+    return _sync_client
+
+
+async def init_llm_clients():
+    """Create the shared clients up front (called at application startup)."""
+    try:
+        get_async_client()
+        get_sync_client()
+        print(f"LLM clients initialised (http2={'on' if _use_http2() else 'off'})")
+    except Exception as e:
+        # Missing credentials shouldn't stop the API from booting; calls will retry creation
+        print(f"Warning: Could not initialise LLM clients: {e}")
+
+
+async def close_llm_clients():
+    """Close the shared clients and their connection pools (called at application shutdown)."""
+    global _async_client, _async_client_loop, _sync_client
+
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+        _async_client_loop = None
+
+    if _sync_client is not None:
+        _sync_client.close()
+        _sync_client = None
+
+    print("LLM clients closed")
+
+
+if __name__ == "__main__":
+    async def test():
+        client = get_async_client()
+        assert client is get_async_client()
+        print(f"Shared async client: {client.base_url}")
+        await close_llm_clients()
+
+    asyncio.run(test())
@@ -3,7 +3,8 @@ import uuid
 from datetime import datetime
 from typing import Dict, Optional
 from .extract_structured_data import extract_structured_data
-from .get_embedding import get_embedding
+from .get_embedding_async import get_embeddings_async
+from .category_registry import category_registry
 
 async def save_complaint(complaint_data: Dict, user_id: Optional[str] = None) -> str:
     """
@@ -18,6 +19,10 @@ async def save_complaint(complaint_data: Dict, user_id: Optional[str] = None) ->
     """
     # Import here to avoid circular imports
     from app.db import get_async_session, Complaint
+    from app.cache import pulse_cache
+    from app.embedding_queue import embedding_queue, EMBEDDING_MODE
+    from app.embedding_cache import embedding_cache
+    from app.complaint_clusters import assign_cluster
     from sqlalchemy import select
 
     # Handle both old and new data formats
@@ -44,13 +49,18 @@ async def save_complaint(complaint_data: Dict, user_id: Optional[str] = None) ->
         keywords = complaint_data.get("keywords", [])
         sentiment_score = complaint_data.get("sentiment_score", 0.0)
 
-    # Generate embedding for similarity search (if available)
+    # Generate embedding for similarity search (if available); in background
+    # mode it is filled in after the complaint is committed
     embedding_vector = None
-    try:
-        embedding_vector = get_embedding(original_text)
-    except Exception as e:
-        print(f"Warning: Could not generate embedding: {e}")
-        print("Similarity search will not be available for this complaint")
+    if EMBEDDING_MODE != "background":
+        try:
+            # Duplicate complaint texts reuse the cached embedding
+            embedding_vector = await embedding_cache.embed(original_text, get_embeddings_async)
+        except Exception as e:
+            print(f"Warning: Could not generate embedding: {e}")
+            print("Similarity search will not be available for this complaint")
+
+    planning_area = complaint_data.get("planning_area", location_description)
 
     # Generate unique complaint ID
     complaint_id = str(uuid.uuid4())
@@ -59,6 +69,14 @@ async def save_complaint(complaint_data: Dict, user_id: Optional[str] = None) ->
     session = get_async_session()
     session_obj = await session.__anext__()
     try:
+        # Attach to a near-duplicate in the same area (background mode does this once embedded)
+        cluster_id = None
+        try:
+            async with session_obj.begin_nested():
+                cluster_id = await assign_cluster(session_obj, embedding_vector, planning_area, category, title)
+        except Exception as e:
+            print(f"Warning: Could not assign complaint cluster: {e}")
+
         complaint = Complaint(
             id=complaint_id,
             user_id=user_id,
@@ -76,7 +94,7 @@ async def save_complaint(complaint_data: Dict, user_id: Optional[str] = None) ->
 
             # Location data
             location_description=location_description,
-            planning_area=complaint_data.get("planning_area", location_description),
+            planning_area=planning_area,
             postal_code=complaint_data.get("postal_code"),
             latitude=complaint_data.get("latitude"),
             longitude=complaint_data.get("longitude"),
@@ -93,6 +111,7 @@ async def save_complaint(complaint_data: Dict, user_id: Optional[str] = None) ->
 
             # Vector embedding
             embedding=embedding_vector,
+            cluster_id=cluster_id,
 
             # Default counts
             upvote_count=0,
@@ -102,6 +121,11 @@ async def save_complaint(complaint_data: Dict, user_id: Optional[str] = None) ->
 
         session_obj.add(complaint)
         await session_obj.commit()
+        if EMBEDDING_MODE == "background":
+            embedding_queue.enqueue(complaint_id, original_text)
+        category_registry.add(category)
+        # New complaints change every Pulse listing and aggregate
+        await pulse_cache.invalidate()
 
         print(f"Saved complaint {complaint_id} to database")
         print(f"Title: {title}")
@@ -1,5 +1,5 @@
 import os
-from openai import OpenAI
+from .llm_client import get_sync_client
 from typing import List, Dict
 
 def stream_llm(messages: List[Dict[str, str]]):
@@ -12,14 +12,7 @@ def stream_llm(messages: List[Dict[str, str]]):
     Returns:
         Generator yielding streaming response chunks
     """
-    print("Creating OpenAI client...")
-    client = OpenAI(
-        api_key=os.getenv("OPENAI_API_KEY"),
-        base_url=os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1"),
-        default_headers={
-            "User-Agent": "ComplainSG/1.0 (OpenAI-Compatible-Client)"
-        }
-    )
+    client = get_sync_client()
 
     print("Making streaming request to OpenAI...")
     response = client.chat.completions.create(
@@ -1,5 +1,5 @@
 import os
-from openai import AsyncOpenAI
+from .llm_client import get_async_client
 from typing import List, Dict, AsyncGenerator
 
 async def stream_llm_async(messages: List[Dict[str, str]]) -> AsyncGenerator[str, None]:
@@ -12,13 +12,7 @@ async def stream_llm_async(messages: List[Dict[str, str]]) -> AsyncGenerator[str
     Yields:
         str: Individual chunks from the LLM response
     """
-    client = AsyncOpenAI(
-        api_key=os.getenv("OPENAI_API_KEY"),
-        base_url=os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1"),
-        default_headers={
-            "User-Agent": "ComplainSG/1.0 (OpenAI-Compatible-Client)"
-        }
-    )
+    client = get_async_client()
 
     response = await client.chat.completions.create(
         model=os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"),
@@ -0,0 +1,182 @@
+import os
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from sqlalchemy import select, func, and_, desc
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import async_session_maker, Complaint, ComplaintAnalytics
+
+ROLLUP_INTERVAL_SECONDS = float(os.getenv("ANALYTICS_ROLLUP_INTERVAL_SECONDS", "300"))
+# Re-scan a little before the last run to catch transactions that committed late
+ROLLUP_OVERLAP = timedelta(seconds=60)
+TRENDING_KEYWORDS_LIMIT = 10
+
+
+def day_start(moment: datetime) -> datetime:
+    """Midnight UTC of the day containing `moment`."""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    moment = moment.astimezone(timezone.utc)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+async def compute_day_rollup(session: AsyncSession, day: datetime) -> Dict:
+    """
+    Aggregate the raw complaints created on one UTC day.
+
+    Args:
+        session: Database session
+        day: Midnight UTC of the day to aggregate
+
+    Returns:
+        Dict with totals, breakdowns, sentiment sum/count and trending keywords
+    """
+    in_day = and_(
+        Complaint.created_at >= day,
+        Complaint.created_at < day + timedelta(days=1),
+    )
+
+    category_result = await session.execute(
+        select(Complaint.category, func.count(Complaint.id))
+        .where(in_day)
+        .group_by(Complaint.category)
+    )
+    category_breakdown = {row[0]: row[1] for row in category_result}
+
+    location_result = await session.execute(
+        select(Complaint.planning_area, func.count(Complaint.id))
+        .where(and_(in_day, Complaint.planning_area.isnot(None)))
+        .group_by(Complaint.planning_area)
+    )
+    location_breakdown = {row[0]: row[1] for row in location_result}
+
+    sentiment_result = await session.execute(
+        select(func.coalesce(func.sum(Complaint.sentiment_score), 0.0), func.count(Complaint.sentiment_score))
+        .where(in_day)
+    )
+    sentiment_sum, sentiment_count = sentiment_result.one()
+
+    keyword = func.unnest(Complaint.keywords).label("keyword")
+    keywords_subquery = select(keyword).where(in_day).subquery()
+    keyword_result = await session.execute(
+        select(keywords_subquery.c.keyword, func.count())
+        .where(keywords_subquery.c.keyword.isnot(None), keywords_subquery.c.keyword != "")
+        .group_by(keywords_subquery.c.keyword)
+        .order_by(desc(func.count()))
+        .limit(TRENDING_KEYWORDS_LIMIT)
+    )
+    trending_keywords = [row[0] for row in keyword_result]
+
+    return {
+        "total_complaints": sum(category_breakdown.values()),
+        "category_breakdown": category_breakdown,
+        "location_breakdown": location_breakdown,
+        "sentiment_sum": float(sentiment_sum),
+        "sentiment_count": sentiment_count,
+        "trending_keywords": trending_keywords,
+    }
+
+
+async def refresh_day(session: AsyncSession, day: datetime):
+    """Recompute and upsert the rollup row for one day."""
+    rollup = await compute_day_rollup(session, day)
+    values = {
+        **rollup,
+        "average_sentiment": (
+            rollup["sentiment_sum"] / rollup["sentiment_count"] if rollup["sentiment_count"] else None
+        ),
+        "refreshed_at": func.now(),
+    }
+    statement = pg_insert(ComplaintAnalytics).values(date=day, **values)
+    statement = statement.on_conflict_do_update(
+        index_elements=[ComplaintAnalytics.date],
+        set_=values,
+    )
+    await session.execute(statement)
+
+
+async def find_dirty_days(session: AsyncSession, since: Optional[datetime]) -> List[datetime]:
+    """
+    Days that have complaints created or updated after `since`.
+
+    Uses the updated_at index, so incremental runs only touch recent changes.
+    A `since` of None returns every day that has complaints.
+    """
+    utc_day = func.date_trunc("day", func.timezone("UTC", Complaint.created_at))
+    query = select(utc_day).distinct()
+    if since is not None:
+        query = query.where(Complaint.updated_at > since)
+
+    result = await session.execute(query)
+    return sorted(row[0].replace(tzinfo=timezone.utc) for row in result if row[0])
+
+
+class AnalyticsRollupJob:
+    """
+    Background job keeping `complaint_analytics` in step with the complaints table.
+
+    Each run re-aggregates only the days with complaints changed since the
+    previous run. The watermark starts from the newest rollup row, so a
+    fresh database is backfilled on the first run.
+    """
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self._watermark: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    async def run_once(self) -> int:
+        """
+        Refresh all dirty days.
+
+        Returns:
+            int: Number of days refreshed
+        """
+        async with self._lock:
+            async with async_session_maker() as session:
+                run_started = (await session.execute(select(func.now()))).scalar()
+
+                since = self._watermark
+                if since is None:
+                    since = (await session.execute(select(func.max(ComplaintAnalytics.refreshed_at)))).scalar()
+                if since is not None:
+                    since = since - ROLLUP_OVERLAP
+
+                days = await find_dirty_days(session, since)
+                for day in days:
+                    await refresh_day(session, day)
+                await session.commit()
+
+            self._watermark = run_started
+            if days:
+                print(f"Refreshed analytics rollups for {len(days)} day(s)")
+            return len(days)
+
+    async def _run_loop(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"Warning: Analytics rollup failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    async def start(self):
+        """Start the periodic rollup (called at application startup)."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_loop())
+
+    async def stop(self):
+        """Stop the periodic rollup (called at application shutdown)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+analytics_rollup_job = AnalyticsRollupJob(interval_seconds=ROLLUP_INTERVAL_SECONDS)
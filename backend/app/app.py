@@ -1,12 +1,13 @@
-from fastapi import FastAPI, Depends, HTTPException, Request, BackgroundTasks
+from fastapi import FastAPI, Depends, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 from uuid import UUID
-import json
 import uuid
 import asyncio
+import json
+import time
 
 from app.db import User, get_async_session, create_db_and_tables
 from app.schemas import (
@@ -21,17 +22,21 @@ from app.conversations import (
     create_conversation_with_messages
 )
 from agent import run_agent_flow
+from agent.utils.llm_client import init_llm_clients, close_llm_clients
+from agent.utils.category_registry import category_registry
 from app.pulse import router as pulse_router
+from app.metrics import metrics, chat_stream_ttft
+from app.analytics_rollup import analytics_rollup_job
+from app.cache import pulse_cache
+from app.view_counter import view_counter
+from app.embedding_queue import embedding_queue, EMBEDDING_MODE
+from app.vector_index import vector_index
+from app.task_broker import task_broker, TaskQueue, TaskExistsError, default_task_metadata
+from app.task_manager import task_manager
+from app.responses import sse_event, dumps
 
 app = FastAPI()
 
-# Dictionary to hold queues for different tasks
-task_queues = {}
-# Dictionary to hold metadata for different tasks
-task_metadata = {}
-# Lock to prevent race conditions when creating tasks
-task_creation_lock = asyncio.Lock()
-
 # Legacy Pydantic models for backwards compatibility
 class ChatMessage(BaseModel):
     user: str
@@ -57,6 +62,33 @@ app.add_middleware(
 async def on_startup():
     # Create database tables
     await create_db_and_tables()
+    # Shared, pooled LLM clients
+    await init_llm_clients()
+    # In-memory complaint categories for the extraction node
+    await category_registry.start()
+    # Keep the Pulse daily rollups up to date
+    await analytics_rollup_job.start()
+    # Batched complaint view counts
+    await view_counter.start()
+    # Reap chat tasks nobody streams
+    await task_manager.start()
+    # Complaint embeddings generated after save
+    if EMBEDDING_MODE == "background":
+        await embedding_queue.start()
+    # ANN index on complaint embeddings
+    await vector_index.start()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await task_manager.stop()
+    await embedding_queue.stop()
+    await vector_index.stop()
+    await analytics_rollup_job.stop()
+    await view_counter.stop()
+    await pulse_cache.close()
+    await task_broker.close()
+    await category_registry.stop()
+    await close_llm_clients()
 
 # Include auth routes
 app.include_router(
@@ -99,6 +131,11 @@ async def health_check():
         "database_url": os.getenv("DATABASE_URL", "not configured")
     }
 
+@app.get("/metrics")
+async def get_metrics():
+    """In-process metrics for this worker."""
+    return metrics.snapshot()
+
 @app.get("/protected")
 async def protected_route(user: User = Depends(current_active_user)):
     return {"message": f"Hello {user.email}!", "is_admin": user.is_admin}
@@ -183,117 +220,211 @@ async def delete_conversation_endpoint(
     return {"message": "Conversation deleted successfully"}
 
 
-# New complaint processing endpoints following the reference pattern
-@app.post("/api/chat")
-async def chat_endpoint(request: Request, background_tasks: BackgroundTasks):
-    """Create a new complaint processing task following reference pattern."""
-    data = await request.json()
-
-    # Task ID for client reference
-    task_id = f"task_{uuid.uuid4().hex[:8]}"
-
-    # Use lock to prevent race conditions
-    async with task_creation_lock:
-        # Check if task queue exists, if not create it
-        if task_id not in task_queues:
-            print(f"Task {task_id} queue not found, creating it...")
-            message_queue = asyncio.Queue()
-            task_queues[task_id] = message_queue
-            print(f"✅ Created new queue for task {task_id}")
-        else:
-            raise Exception(f"Task {task_id} already exists")
-
-    # Populate dictionary with task metadata from POST
-    print(f"🔍 DATA: {data}")
-
-    task_metadata[task_id] = {
+def task_metadata_from_request(data: dict) -> dict:
+    """Task metadata from the client's `threadMetaData`."""
+    return {
         "complaint_topic": data.get("threadMetaData", {}).get("topic", ""),
         "complaint_summary": data.get("threadMetaData", {}).get("summary", ""),
         "complaint_location": data.get("threadMetaData", {}).get("location", ""),
         "complaint_quality": data.get("threadMetaData", {}).get("quality", 0),
     }
 
+
+async def start_chat_task(conversation_history: list, metadata: dict, queue_policy: Optional[str] = None) -> str:
+    """
+    Register a chat task and start its flow in the background.
+
+    Args:
+        conversation_history: Messages so far, ending with the user's new message
+        metadata: Task metadata dict; the flow updates it in place
+        queue_policy: What to do when the client falls behind ("block" or
+            "drop_coalesce"); defaults to TASK_QUEUE_POLICY
+
+    Returns:
+        str: The new task ID
+    """
+    # Task ID for client reference
+    task_id = f"task_{uuid.uuid4().hex[:8]}"
+
+    # Register the task with the broker so any worker can serve its stream.
+    # Creation is an atomic create-if-absent, so no lock is needed.
+    await task_broker.create(task_id, metadata, policy=queue_policy)
+    print(f"✅ Created new task {task_id}")
+    task_manager.register(task_id)
+
+    # Queue-like handle the flow streams into
+    message_queue = TaskQueue(task_broker, task_id, metadata)
+
     # Define all shared parameters here and kick off the flow
     shared_store = {
-        "conversation_history": data.get("messages", []),
+        "conversation_history": conversation_history,
         # Reference to queue for streaming response (for that id)
         "message_queue": message_queue,
         "task_id": task_id,
         "status": "continue",
         # Reference to dictionary (for that id)
-        "task_metadata": task_metadata[task_id],
+        "task_metadata": message_queue.metadata,
     }
 
     print(f"🚀 Starting background flow for task {task_id}")
-    background_tasks.add_task(run_flow, shared_store)
+    task_manager.start_flow(task_id, run_flow(shared_store), queue=message_queue)
+    return task_id
+
+
+# New complaint processing endpoints following the reference pattern
+@app.post("/api/chat")
+async def chat_endpoint(request: Request):
+    """Create a new complaint processing task following reference pattern."""
+    data = await request.json()
+
+    # Populate task metadata from POST
+    print(f"🔍 DATA: {data}")
+
+    try:
+        task_id = await start_chat_task(data.get("messages", []), task_metadata_from_request(data))
+    except TaskExistsError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     return {"task_id": task_id}
 
 
 # SSE endpoint to receive streaming response from the queue for a specific task
 @app.get("/api/chat/stream/{task_id}")
-async def stream_endpoint(task_id: str):
+async def stream_endpoint(task_id: str, request: Request, last_event_id: Optional[str] = None):
     """
-    This endpoint returns the streaming response from the queue for a specific task.
-    If the task doesn't exist, it creates the task ID and queue but doesn't run the flow.
+    This endpoint returns the streaming response from the task broker for a specific task.
+    The task may have been started on any worker. If the task doesn't exist, it
+    registers the task ID but doesn't run the flow; a resume request for a task
+    that no longer exists gets a 404 instead.
+
+    Every event carries an SSE `id:`. A client that reconnects with the
+    Last-Event-ID header (or `last_event_id` query parameter) resumes after
+    that event instead of starting a new LLM call.
     """
-    print(f"📥 GET /api/chat/stream/{task_id} - Current tasks: {list(task_queues.keys())}")
-
-    # Use lock to prevent race conditions
-    async with task_creation_lock:
-        # If task doesn't exist, create the queue only (no flow execution)
-        if task_id not in task_queues:
-            print(f"Task {task_id} not found, creating queue...")
-            message_queue = asyncio.Queue()
-            task_queues[task_id] = message_queue
-            print(f"✅ Queue created for task {task_id}")
-        else:
-            print(f"✅ Task {task_id} already exists")
-        if task_id not in task_metadata:
-            print(f"Task {task_id} not found, creating metadata...")
-            task_metadata[task_id] = {
-                "complaint_topic": "",
-                "complaint_quality": 0,
-                "complaint_summary": "",
-                "complaint_location": ""
-            }
-            print(f"✅ Metadata created for task {task_id}")
+    resume_after = request.headers.get("last-event-id") or last_event_id
+    print(f"📥 GET /api/chat/stream/{task_id}" + (f" (resuming after {resume_after})" if resume_after else ""))
+
+    if resume_after and not await task_broker.exists(task_id):
+        # Already streamed to the end and cleaned up, or expired
+        raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
+
+    # If task doesn't exist, register it only (no flow execution); atomic get-or-create
+    await task_broker.ensure(task_id)
+    task_manager.attach(task_id)
 
     async def stream_generator():
-        queue = task_queues[task_id]
         print(f"🔄 Starting stream for task {task_id}")
+        stream_started = time.perf_counter()
+        first_token_sent = resume_after is not None
+        completed = False
         try:
-            while True:
-                message = await queue.get()
-                # If message is done, queue will have None at the end
+            async for event_id, message in task_broker.subscribe(task_id, after=resume_after):
+                # If message is done, the stream will have None at the end
                 if message is None:
                     print(f"🏁 End of stream for task {task_id}")
 
                     # Metadata is generated before stream, but only retrieve after stream is done to prevent race condition
-                    stored_metadata = task_metadata.get(task_id, {})
+                    stored_metadata = await task_broker.get_metadata(task_id)
                     metadata = {
                         "type": "metadata",
                         "threadMetaData": stored_metadata
                     }
 
                     print(f"🔍 Sending metadata: {metadata}")
-                    yield f"data: {json.dumps(metadata)}\n\n"
+                    yield sse_event(metadata, event_id)
                     # Sentinel to indicate the end of the stream
-                    yield f"data: {json.dumps({'done': True})}\n\n"
+                    yield sse_event({'done': True}, event_id)
+                    completed = True
                     break
-                yield f"data: {json.dumps({'content': message})}\n\n"
-                queue.task_done()
+                if not first_token_sent:
+                    chat_stream_ttft.observe(time.perf_counter() - stream_started)
+                    first_token_sent = True
+                yield sse_event({'content': message}, event_id)
         finally:
-            # Clean up the queue and metadata
-            if task_id in task_queues:
-                print(f"🧹 Cleaning up task {task_id}")
-                del task_queues[task_id]
-            if task_id in task_metadata:
-                print(f"🧹 Cleaning up metadata for task {task_id}")
-                del task_metadata[task_id]
+            # Drop the task once streamed; otherwise keep it for a resume grace period
+            print(f"🧹 Cleaning up task {task_id}" if completed else f"⏸️ Stream for task {task_id} interrupted")
+            await task_manager.detach(task_id, completed)
 
     return StreamingResponse(stream_generator(), media_type="text/event-stream")
 
 
+# WebSocket transport: one connection per chat session
+@app.websocket("/api/chat/ws")
+async def chat_websocket(websocket: WebSocket):
+    """
+    Run the complaint flow over one long-lived WebSocket.
+
+    The server keeps the session's conversation history and thread metadata,
+    so each turn only sends the new message:
+
+        -> {"type": "init", "messages": [...], "threadMetaData": {...}}   (optional, to continue a conversation)
+        -> {"message": "..."}
+        <- {"task_id": "..."}, then the same frames as the SSE stream:
+           {"content": ...} ..., {"type": "metadata", ...}, {"done": true}
+    """
+    await websocket.accept()
+    conversation_history = []
+    metadata = default_task_metadata()
+
+    async def send(payload):
+        await websocket.send_text(dumps(payload).decode("utf-8"))
+
+    try:
+        while True:
+            # A malformed frame gets an error reply instead of closing the session
+            try:
+                data = json.loads(await websocket.receive_text())
+            except ValueError:
+                await send({"error": "Frames must be JSON objects"})
+                continue
+            if not isinstance(data, dict):
+                await send({"error": "Frames must be JSON objects"})
+                continue
+
+            if data.get("type") == "init":
+                messages = data.get("messages", [])
+                if not isinstance(messages, list) or not isinstance(data.get("threadMetaData", {}), dict):
+                    await send({"error": "\"messages\" must be a list and \"threadMetaData\" an object"})
+                    continue
+                conversation_history = list(messages)
+                metadata = task_metadata_from_request(data)
+                continue
+
+            message = data.get("message")
+            if not message or not isinstance(message, str):
+                await send({"error": "Expected {\"message\": \"...\"}"})
+                continue
+
+            conversation_history.append({"role": "user", "content": message})
+            # The flow appends to the history it is given; keep the session copy ours
+            try:
+                task_id = await start_chat_task(list(conversation_history), metadata)
+            except TaskExistsError as e:
+                conversation_history.pop()
+                await send({"error": str(e)})
+                continue
+            task_manager.attach(task_id)
+            await send({"task_id": task_id})
+
+            response = ""
+            completed = False
+            try:
+                async for event_id, chunk in task_broker.subscribe(task_id):
+                    if chunk is None:
+                        metadata = await task_broker.get_metadata(task_id) or metadata
+                        await send({"type": "metadata", "threadMetaData": metadata})
+                        await send({"done": True})
+                        completed = True
+                        break
+                    response += chunk
+                    await send({"content": chunk})
+            finally:
+                await task_manager.detach(task_id, completed, resumable=False)
+
+            conversation_history.append({"role": "assistant", "content": response})
+    except WebSocketDisconnect:
+        print("🔌 Chat WebSocket disconnected")
+
+
 
 
 
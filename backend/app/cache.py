@@ -0,0 +1,185 @@
+import os
+import json
+import time
+import asyncio
+import functools
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+from urllib.parse import urlencode
+
+from app.metrics import metrics
+
+# Try to import redis, but make it optional
+try:
+    import redis.asyncio as redis
+    HAS_REDIS = True
+except ImportError:
+    HAS_REDIS = False
+
+cache_hits = metrics.counter("pulse_cache_hits", "Pulse responses served from cache")
+cache_misses = metrics.counter("pulse_cache_misses", "Pulse responses computed from the database")
+
+
+class CacheBackend:
+    """Storage for cached values. Values must be JSON-serialisable."""
+
+    async def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Any, ttl: float):
+        raise NotImplementedError
+
+    async def invalidate(self, prefix: str):
+        """Drop every entry whose key starts with `prefix`."""
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class InMemoryLRUCache(CacheBackend):
+    """Per-process LRU cache with per-entry TTLs."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def invalidate(self, prefix: str):
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            del self._entries[key]
+
+
+class RedisCache(CacheBackend):
+    """Cache shared by all workers through a Redis-compatible server."""
+
+    def __init__(self, url: str):
+        self.client = redis.from_url(url, decode_responses=True)
+
+    async def get(self, key: str) -> Optional[Any]:
+        try:
+            value = await self.client.get(key)
+        except Exception as e:
+            print(f"Warning: Redis cache read failed: {e}")
+            return None
+        return json.loads(value) if value is not None else None
+
+    async def set(self, key: str, value: Any, ttl: float):
+        try:
+            await self.client.set(key, json.dumps(value), px=int(ttl * 1000))
+        except Exception as e:
+            print(f"Warning: Redis cache write failed: {e}")
+
+    async def invalidate(self, prefix: str):
+        try:
+            keys = [key async for key in self.client.scan_iter(match=f"{prefix}*")]
+            if keys:
+                await self.client.delete(*keys)
+        except Exception as e:
+            print(f"Warning: Redis cache invalidation failed: {e}")
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class ResponseCache:
+    """
+    Caches endpoint responses keyed by route and normalised query parameters.
+
+    Concurrent misses for the same key are collapsed into one computation,
+    so a burst of identical dashboard requests costs one database round trip.
+    """
+
+    def __init__(self, backend: CacheBackend, namespace: str, default_ttl: float):
+        self.backend = backend
+        self.namespace = namespace
+        self.default_ttl = default_ttl
+        self._inflight: Dict[str, asyncio.Lock] = {}
+
+    def make_key(self, route: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Build a cache key; parameter order and unset (None) parameters don't matter."""
+        normalised = sorted((name, str(value)) for name, value in (params or {}).items() if value is not None)
+        return f"{self.namespace}:{route}?{urlencode(normalised)}"
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]], ttl: Optional[float] = None) -> Any:
+        value = await self.backend.get(key)
+        if value is not None:
+            cache_hits.inc()
+            return value
+
+        lock = self._inflight.setdefault(key, asyncio.Lock())
+        try:
+            async with lock:
+                # Another request may have filled the entry while we waited
+                value = await self.backend.get(key)
+                if value is not None:
+                    cache_hits.inc()
+                    return value
+
+                cache_misses.inc()
+                value = await compute()
+                await self.backend.set(key, value, ttl or self.default_ttl)
+                return value
+        finally:
+            if not lock.locked() and self._inflight.get(key) is lock:
+                del self._inflight[key]
+
+    async def invalidate(self, *routes: str):
+        """Drop cached responses for the given routes, or for every route if none are given."""
+        for route in routes or ("",):
+            await self.backend.invalidate(f"{self.namespace}:{route}")
+
+    def cached(self, route: str, ttl: Optional[float] = None, exclude=("session", "request", "response"), response_class=None):
+        """
+        Decorator caching an endpoint's return value.
+
+        Every endpoint argument except those in `exclude` (dependencies) is
+        part of the cache key. With `response_class`, the cached payload is
+        wrapped in that response directly instead of going through FastAPI's
+        encoder.
+        """
+        def decorator(endpoint):
+            @functools.wraps(endpoint)
+            async def wrapper(**kwargs):
+                params = {name: value for name, value in kwargs.items() if name not in exclude}
+                key = self.make_key(route, params)
+                value = await self.get_or_compute(key, lambda: endpoint(**kwargs), ttl)
+                return response_class(value) if response_class else value
+            return wrapper
+        return decorator
+
+    async def close(self):
+        await self.backend.close()
+
+
+def create_cache_backend() -> CacheBackend:
+    """Pick the cache backend from PULSE_CACHE_BACKEND ("memory" or "redis")."""
+    backend = os.getenv("PULSE_CACHE_BACKEND", "memory").lower()
+    if backend == "redis":
+        if HAS_REDIS:
+            return RedisCache(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+        print("Warning: redis not available. Falling back to in-memory Pulse cache.")
+    return InMemoryLRUCache(max_entries=int(os.getenv("PULSE_CACHE_MAX_ENTRIES", "1024")))
+
+
+pulse_cache = ResponseCache(
+    create_cache_backend(),
+    namespace="pulse",
+    default_ttl=float(os.getenv("PULSE_CACHE_TTL_SECONDS", "30")),
+)
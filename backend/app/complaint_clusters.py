@@ -0,0 +1,102 @@
+import os
+import uuid
+from typing import List, Optional
+from sqlalchemy import select, insert, update, func, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import ComplaintCluster, HAS_VECTOR
+from app.metrics import metrics
+
+# Cosine similarity (0-1) a complaint needs to join an existing cluster
+CLUSTER_SIMILARITY_THRESHOLD = float(os.getenv("CLUSTER_SIMILARITY_THRESHOLD", "0.9"))
+# Only clusters that received a complaint this recently can be joined
+CLUSTER_WINDOW_DAYS = int(os.getenv("CLUSTER_WINDOW_DAYS", "7"))
+
+# First key of the two-key advisory lock serializing cluster assignment per planning area
+CLUSTER_LOCK_CLASS = 720232
+
+clusters_created = metrics.counter("complaint_clusters_created", "Clusters started by a complaint with no near duplicate")
+complaints_clustered = metrics.counter("complaint_clusters_joined", "Complaints attached to an existing cluster")
+
+
+def running_mean(centroid, count: int, embedding: List[float]) -> List[float]:
+    """Centroid of `count` vectors after adding `embedding`."""
+    return [float(c + (e - c) / (count + 1)) for c, e in zip(centroid, embedding)]
+
+
+async def assign_cluster(
+    session: AsyncSession,
+    embedding: Optional[List[float]],
+    planning_area: Optional[str],
+    category: str,
+    title: str,
+) -> Optional[uuid.UUID]:
+    """
+    Find or start the cluster for a new complaint.
+
+    Compares the embedding with the centroids of the planning area's recent
+    clusters. Above CLUSTER_SIMILARITY_THRESHOLD the complaint joins the
+    closest one (updating its count, centroid and last_seen); otherwise it
+    starts a new cluster. Runs in the caller's transaction, which holds a
+    per-area advisory lock until commit so concurrent saves can't start
+    duplicate clusters.
+
+    Args:
+        session: Session the complaint is saved or updated in
+        embedding: The complaint's embedding
+        planning_area: The complaint's planning area
+        category: The complaint's category (kept if it starts a cluster)
+        title: The complaint's title (kept if it starts a cluster)
+
+    Returns:
+        The cluster id, or None when the complaint can't be clustered
+        (no embedding, no planning area or no pgvector)
+    """
+    if not HAS_VECTOR or embedding is None or not planning_area:
+        return None
+
+    await session.execute(
+        text("SELECT pg_advisory_xact_lock(:lock_class, hashtext(:area))"),
+        {"lock_class": CLUSTER_LOCK_CLASS, "area": planning_area}
+    )
+
+    # An area only has a handful of live clusters, so an exact scan over
+    # idx_complaint_clusters_area_last_seen is enough (no ANN index needed)
+    distance = ComplaintCluster.centroid.cosine_distance(embedding)
+    result = await session.execute(
+        select(ComplaintCluster.id, ComplaintCluster.centroid, ComplaintCluster.complaint_count, distance.label("distance"))
+        .where(
+            ComplaintCluster.planning_area == planning_area,
+            ComplaintCluster.last_seen >= func.now() - func.make_interval(0, 0, 0, CLUSTER_WINDOW_DAYS),
+        )
+        .order_by(distance)
+        .limit(1)
+    )
+    nearest = result.first()
+
+    if nearest is not None and 1 - nearest.distance >= CLUSTER_SIMILARITY_THRESHOLD:
+        await session.execute(
+            update(ComplaintCluster)
+            .where(ComplaintCluster.id == nearest.id)
+            .values(
+                centroid=running_mean(nearest.centroid, nearest.complaint_count, embedding),
+                complaint_count=ComplaintCluster.complaint_count + 1,
+                last_seen=func.now(),
+            )
+        )
+        complaints_clustered.inc()
+        return nearest.id
+
+    cluster_id = uuid.uuid4()
+    await session.execute(
+        insert(ComplaintCluster).values(
+            id=cluster_id,
+            planning_area=planning_area,
+            title=title,
+            category=category,
+            centroid=embedding,
+            complaint_count=1,
+        )
+    )
+    clusters_created.inc()
+    return cluster_id
@@ -1,10 +1,11 @@
 import os
 from typing import AsyncGenerator
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy.orm import DeclarativeBase, relationship
+from sqlalchemy.orm import DeclarativeBase, relationship, deferred
 from fastapi_users.db import SQLAlchemyBaseUserTableUUID
 from sqlalchemy import Boolean, Column, DateTime, func, String, Text, ForeignKey, UUID, Float, Integer, JSON, Index, text
 from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.schema import CreateIndex
 import uuid
 
 # Try to import pgvector, but make it optional
@@ -75,8 +76,9 @@ class Complaint(Base):
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)  # Optional for anonymous complaints
 
     # Original complaint text and metadata
-    original_text = Column(Text, nullable=False)
-    conversation_history = Column(JSON, nullable=True)  # Store the Q&A history
+    # Heavy columns are deferred: only loaded when a query asks for them with undefer()/load_only()
+    original_text = deferred(Column(Text, nullable=False))
+    conversation_history = deferred(Column(JSON, nullable=True))  # Store the Q&A history
 
     # Structured fields extracted by LLM
     title = Column(String(500), nullable=False)
@@ -103,7 +105,10 @@ class Complaint(Base):
     keywords = Column(ARRAY(String), nullable=True)
 
     # Vector embedding for similarity search
-    embedding = Column(Vector(1536), nullable=True)  # OpenAI ada-002 dimension
+    embedding = deferred(Column(Vector(1536), nullable=True))  # OpenAI ada-002 dimension
+
+    # Near-duplicate group (same incident reported many times), see app/complaint_clusters.py
+    cluster_id = Column(UUID(as_uuid=True), ForeignKey("complaint_clusters.id"), nullable=True)
 
     # Analytics fields
     view_count = Column(Integer, default=0)
@@ -126,7 +131,16 @@ class Complaint(Base):
         Index('idx_complaints_location', 'planning_area', 'postal_code'),
         Index('idx_complaints_created_at', 'created_at'),
         Index('idx_complaints_status', 'status'),
-        Index('idx_complaints_embedding_cosine', 'embedding', postgresql_using='ivfflat', postgresql_ops={'embedding': 'vector_cosine_ops'}),
+        Index('idx_complaints_updated_at', 'updated_at'),
+        # Keyset pagination for /pulse/complaints, one per filter
+        Index('idx_complaints_created_at_id', 'created_at', 'id'),
+        Index('idx_complaints_category_created_at_id', 'category', 'created_at', 'id'),
+        Index('idx_complaints_planning_area_created_at_id', 'planning_area', 'created_at', 'id'),
+        Index('idx_complaints_urgency_created_at_id', 'urgency', 'created_at', 'id'),
+        Index('idx_complaints_cluster_id_created_at_id', 'cluster_id', 'created_at', 'id'),
+        # Keyset scan over complaints still waiting for an embedding (backfill)
+        Index('idx_complaints_missing_embedding', 'id', postgresql_where=text('embedding IS NULL')),
+        # The embedding index is managed by app/vector_index.py
     )
 
 
@@ -151,6 +165,9 @@ class ComplaintComment(Base):
     user = relationship("User")
     parent_comment = relationship("ComplaintComment", remote_side=[id], backref="replies")
 
+    # Fetch server defaults (created_at) with RETURNING on insert
+    __mapper_args__ = {"eager_defaults": True}
+
 
 class ComplaintVote(Base):
     __tablename__ = "complaint_votes"
@@ -183,14 +200,96 @@ class ComplaintAnalytics(Base):
     category_breakdown = Column(JSON, nullable=True)  # {"transport": 10, "housing": 5}
     location_breakdown = Column(JSON, nullable=True)  # {"Tampines": 8, "Jurong": 7}
     average_sentiment = Column(Float, nullable=True)
+    sentiment_sum = Column(Float, default=0.0)  # Kept so averages can be combined across days
+    sentiment_count = Column(Integer, default=0)
     trending_keywords = Column(ARRAY(String), nullable=True)
 
+    refreshed_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
     # Unique constraint on date
     __table_args__ = (
         Index('unique_analytics_date', 'date', unique=True),
     )
 
 
+class EmbeddingCacheEntry(Base):
+    """Embedding of a normalized text, shared by every complaint with that text."""
+    __tablename__ = "embedding_cache"
+
+    model = Column(String(100), primary_key=True)
+    text_hash = Column(String(64), primary_key=True)  # sha256 of the normalized text
+    embedding = Column(Vector(1536), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class ComplaintCluster(Base):
+    """Complaints in one planning area that describe the same incident."""
+    __tablename__ = "complaint_clusters"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    planning_area = Column(String(100), nullable=False)
+    # Taken from the complaint that started the cluster
+    title = Column(String(500), nullable=False)
+    category = Column(String(100), nullable=False)
+
+    # Running mean of the member embeddings
+    centroid = deferred(Column(Vector(1536), nullable=False))
+    complaint_count = Column(Integer, nullable=False, default=1)
+
+    first_seen = Column(DateTime(timezone=True), server_default=func.now())
+    last_seen = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # Candidate lookup at save time: recent clusters in one area
+        Index('idx_complaint_clusters_area_last_seen', 'planning_area', 'last_seen'),
+        Index('idx_complaint_clusters_last_seen', 'last_seen'),
+    )
+
+
+# create_all() never alters existing tables, so columns added later are applied here
+SCHEMA_UPGRADES = [
+    "ALTER TABLE complaint_analytics ADD COLUMN IF NOT EXISTS sentiment_sum DOUBLE PRECISION DEFAULT 0",
+    "ALTER TABLE complaint_analytics ADD COLUMN IF NOT EXISTS sentiment_count INTEGER DEFAULT 0",
+    "ALTER TABLE complaint_analytics ADD COLUMN IF NOT EXISTS refreshed_at TIMESTAMP WITH TIME ZONE DEFAULT now()",
+    "ALTER TABLE complaints ADD COLUMN IF NOT EXISTS cluster_id UUID REFERENCES complaint_clusters(id)",
+]
+
+
+# Advisory lock held by the worker adding missing indexes at startup
+INDEX_BUILD_LOCK_KEY = 720233
+
+
+async def create_missing_indexes():
+    """
+    create_all() only builds indexes for new tables, so add any defined since.
+
+    Indexes are built with CREATE INDEX CONCURRENTLY, so writes to a large
+    table carry on during the build. One worker builds them; the others skip.
+    """
+    # CREATE/DROP INDEX CONCURRENTLY can't run inside a transaction
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        locked = (await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": INDEX_BUILD_LOCK_KEY})).scalar()
+        if not locked:
+            # Another worker is building them
+            return
+        try:
+            # An interrupted concurrent build leaves an invalid index that IF NOT EXISTS would keep
+            result = await conn.execute(text(
+                "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE NOT i.indisvalid AND pg_table_is_visible(c.oid)"
+            ))
+            invalid = {row[0] for row in result}
+            for table in Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    if index.name in invalid:
+                        await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index.name}"))
+                    statement = str(CreateIndex(index, if_not_exists=True).compile(dialect=conn.dialect))
+                    await conn.execute(text(statement.replace("INDEX", "INDEX CONCURRENTLY", 1)))
+        finally:
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": INDEX_BUILD_LOCK_KEY})
+
+
 async def create_db_and_tables():
     async with engine.begin() as conn:
         # Try to create pgvector extension if it doesn't exist and we have pgvector
@@ -204,6 +303,11 @@ async def create_db_and_tables():
 
         await conn.run_sync(Base.metadata.create_all)
 
+        for statement in SCHEMA_UPGRADES:
+            await conn.execute(text(statement))
+
+    await create_missing_indexes()
+
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
     async with async_session_maker() as session:
         yield session
\ No newline at end of file
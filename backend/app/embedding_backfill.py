@@ -0,0 +1,208 @@
+"""
+Backfill embeddings for complaints saved without one.
+
+Scans `complaints WHERE embedding IS NULL` in id order (keyset pagination on
+a partial index), embeds each batch with one API request, and writes the
+batch back with one UPDATE ... FROM (VALUES ...). Texts already in the
+embedding cache are not sent to the provider again. Progress is checkpointed
+to a JSON file after every batch, so an interrupted run resumes where it
+stopped; a run that reaches the end removes the checkpoint.
+
+The fake provider (deterministic vectors, no API calls) is for trying the
+job out. It never touches the application tables: it requires --schema and
+works on the `complaints` table of that schema (e.g. a benchmark copy).
+
+Usage:
+    uv run python -m app.embedding_backfill [--batch-size 200] [--limit N] [--reset]
+    uv run python -m app.embedding_backfill --provider fake --schema bench_embeddings
+"""
+import os
+import json
+import uuid
+import asyncio
+import argparse
+import functools
+from typing import Awaitable, Callable, List, Optional
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db import ASYNC_DATABASE_URL, async_session_maker, Complaint
+from app.embedding_cache import embedding_cache, DEFAULT_EMBEDDING_MODEL
+
+BATCH_SIZE = int(os.getenv("EMBEDDING_BACKFILL_BATCH_SIZE", "200"))
+CHECKPOINT_PATH = os.getenv("EMBEDDING_BACKFILL_CHECKPOINT", ".embedding_backfill.json")
+MAX_ATTEMPTS = 3
+
+EmbedBatch = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+
+def get_embed_batch(provider: str) -> EmbedBatch:
+    """Cached embedding function for a provider name ("openai" or "fake")."""
+    if provider == "fake":
+        from agent.utils.fake_embedding import fake_embeddings_async
+        # Not cached: fake vectors must never land in the shared embedding cache
+        return fake_embeddings_async
+    from agent.utils.get_embedding_async import get_embeddings_async
+    return functools.partial(embedding_cache.embed_many, embed_batch=get_embeddings_async, model=DEFAULT_EMBEDDING_MODEL)
+
+
+def vector_literal(embedding: List[float]) -> str:
+    """pgvector text form, e.g. '[0.1,0.2]'."""
+    return "[" + ",".join(repr(float(value)) for value in embedding) + "]"
+
+
+class EmbeddingBackfill:
+    """Resumable batch job filling in NULL complaint embeddings."""
+
+    def __init__(self, embed_batch: EmbedBatch, batch_size: int = BATCH_SIZE, checkpoint_path: str = CHECKPOINT_PATH,
+                 session_maker=async_session_maker):
+        self.embed_batch = embed_batch
+        self.session_maker = session_maker
+        self.batch_size = batch_size
+        self.checkpoint_path = checkpoint_path
+
+    def load_checkpoint(self) -> dict:
+        if not os.path.exists(self.checkpoint_path):
+            return {"last_id": None, "embedded": 0}
+        with open(self.checkpoint_path) as f:
+            return json.load(f)
+
+    def save_checkpoint(self, checkpoint: dict):
+        # Write then rename, so a crash never leaves a half-written file
+        temporary_path = f"{self.checkpoint_path}.tmp"
+        with open(temporary_path, "w") as f:
+            json.dump(checkpoint, f)
+        os.replace(temporary_path, self.checkpoint_path)
+
+    def clear_checkpoint(self):
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+    async def fetch_batch(self, session, last_id: Optional[str]):
+        query = (
+            select(Complaint.id, Complaint.original_text)
+            .where(Complaint.embedding.is_(None))
+            .order_by(Complaint.id)
+            .limit(self.batch_size)
+        )
+        if last_id is not None:
+            query = query.where(Complaint.id > uuid.UUID(last_id))
+        return (await session.execute(query)).all()
+
+    async def embed_with_retry(self, texts: List[str]) -> List[List[float]]:
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                return await self.embed_batch(texts)
+            except Exception as e:
+                if attempt == MAX_ATTEMPTS:
+                    raise
+                print(f"Warning: Embedding batch failed (attempt {attempt}/{MAX_ATTEMPTS}): {e}")
+                await asyncio.sleep(2 ** attempt)
+
+    async def write_batch(self, session, ids: List, embeddings: List[List[float]]):
+        """Store a batch of embeddings with one statement."""
+        values = ", ".join(f"(CAST(:id_{i} AS uuid), CAST(:embedding_{i} AS vector))" for i in range(len(ids)))
+        params = {}
+        for i, (complaint_id, embedding) in enumerate(zip(ids, embeddings)):
+            params[f"id_{i}"] = str(complaint_id)
+            params[f"embedding_{i}"] = vector_literal(embedding)
+
+        await session.execute(
+            text(f"""
+            UPDATE complaints AS c
+            SET embedding = v.embedding
+            FROM (VALUES {values}) AS v(id, embedding)
+            WHERE c.id = v.id AND c.embedding IS NULL
+            """),
+            params
+        )
+
+    async def run(self, limit: Optional[int] = None) -> int:
+        """
+        Embed complaints until none are left (or `limit` have been done).
+
+        Returns:
+            int: Number of complaints embedded in this run
+        """
+        checkpoint = self.load_checkpoint()
+        if checkpoint["last_id"]:
+            print(f"Resuming after complaint {checkpoint['last_id']} ({checkpoint['embedded']} embedded so far)")
+
+        embedded = 0
+        while limit is None or embedded < limit:
+            async with self.session_maker() as session:
+                rows = await self.fetch_batch(session, checkpoint["last_id"])
+                if not rows:
+                    self.clear_checkpoint()
+                    print(f"Backfill complete: {checkpoint['embedded']} complaint(s) embedded")
+                    break
+
+                # Empty complaints can't be embedded; skip past them
+                batch = [(row.id, row.original_text) for row in rows if row.original_text and row.original_text.strip()]
+                if batch:
+                    embeddings = await self.embed_with_retry([original_text for _, original_text in batch])
+                    await self.write_batch(session, [complaint_id for complaint_id, _ in batch], embeddings)
+                    await session.commit()
+
+            embedded += len(batch)
+            checkpoint = {"last_id": str(rows[-1].id), "embedded": checkpoint["embedded"] + len(batch)}
+            self.save_checkpoint(checkpoint)
+            print(f"Embedded {len(batch)} complaint(s), {checkpoint['embedded']} total")
+
+        return embedded
+
+
+def schema_session_maker(schema: str):
+    """Sessions whose `complaints` is `schema`.complaints instead of the application table."""
+    engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        # search_path for the raw UPDATE, schema_translate_map for ORM queries
+        connect_args={"server_settings": {"search_path": f"{schema},public"}},
+        execution_options={"schema_translate_map": {None: schema}},
+    )
+    return engine, async_sessionmaker(engine, expire_on_commit=False)
+
+
+async def main(batch_size: int, limit: Optional[int], provider: str, reset: bool, schema: Optional[str]):
+    engine, session_maker = None, async_session_maker
+    if schema:
+        engine, session_maker = schema_session_maker(schema)
+        async with engine.connect() as conn:
+            found = (await conn.execute(
+                text("SELECT 1 FROM information_schema.tables WHERE table_schema = :schema AND table_name = 'complaints'"),
+                {"schema": schema}
+            )).scalar()
+        if not found:
+            await engine.dispose()
+            raise SystemExit(f"No complaints table in schema {schema}")
+
+    checkpoint_path = f"{CHECKPOINT_PATH}.{schema}" if schema else CHECKPOINT_PATH
+    backfill = EmbeddingBackfill(get_embed_batch(provider), batch_size=batch_size,
+                                 checkpoint_path=checkpoint_path, session_maker=session_maker)
+    if reset:
+        backfill.clear_checkpoint()
+    try:
+        await backfill.run(limit=limit)
+    finally:
+        if engine is not None:
+            await engine.dispose()
+        if provider != "fake":
+            from agent.utils.llm_client import close_llm_clients
+            await close_llm_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many complaints")
+    parser.add_argument("--provider", choices=("openai", "fake"), default=os.getenv("EMBEDDING_PROVIDER", "openai"))
+    parser.add_argument("--schema", default=None, help="Backfill <schema>.complaints instead of the application table")
+    parser.add_argument("--reset", action="store_true", help="Ignore the checkpoint and start from the beginning")
+    args = parser.parse_args()
+
+    # Fake vectors in the real table would poison similarity search and clusters,
+    # and a later real backfill would skip those rows
+    if args.provider == "fake" and (not args.schema or args.schema == "public"):
+        parser.error("--provider fake needs --schema pointing at a non-application schema")
+
+    asyncio.run(main(args.batch_size, args.limit, args.provider, args.reset, args.schema))
@@ -0,0 +1,128 @@
+import os
+import re
+import array
+import hashlib
+from typing import Awaitable, Callable, Dict, List
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.db import async_session_maker, EmbeddingCacheEntry
+from app.cache import InMemoryLRUCache
+from app.metrics import metrics
+
+DEFAULT_EMBEDDING_MODEL = "text-embedding-3-small"
+
+embedding_cache_memory_hits = metrics.counter("embedding_cache_memory_hits", "Embeddings served from the in-process LRU")
+embedding_cache_db_hits = metrics.counter("embedding_cache_db_hits", "Embeddings served from the embedding_cache table")
+embedding_cache_misses = metrics.counter("embedding_cache_misses", "Embeddings that had to be requested from the provider")
+
+EmbedBatch = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+
+def normalize_text(text: str) -> str:
+    """Whitespace-insensitive form of a complaint text (case is kept: it can carry meaning)."""
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Embeddings keyed by (model, sha256 of the normalized text).
+
+    Lookups go to an in-process LRU first, then to the `embedding_cache`
+    table, and only then to the provider, so duplicate complaint texts
+    (the same incident reported many times) are embedded once. Vectors are
+    held in the LRU as float32 arrays to keep memory per entry small.
+    """
+
+    def __init__(self, max_entries: int):
+        self.memory = InMemoryLRUCache(max_entries=max_entries)
+
+    @staticmethod
+    def _memory_key(model: str, digest: str) -> str:
+        return f"{model}:{digest}"
+
+    async def get_many(self, model: str, digests: List[str]) -> Dict[str, List[float]]:
+        """Cached embeddings for the given text hashes (missing ones are left out)."""
+        found = {}
+        for digest in digests:
+            vector = await self.memory.get(self._memory_key(model, digest))
+            if vector is not None:
+                found[digest] = list(vector)
+        embedding_cache_memory_hits.inc(len(found))
+
+        missing = [digest for digest in digests if digest not in found]
+        if missing:
+            async with async_session_maker() as session:
+                result = await session.execute(
+                    select(EmbeddingCacheEntry.text_hash, EmbeddingCacheEntry.embedding)
+                    .where(EmbeddingCacheEntry.model == model, EmbeddingCacheEntry.text_hash.in_(missing))
+                )
+                rows = result.all()
+            for digest, embedding in rows:
+                found[digest] = list(embedding)
+                await self.memory.set(self._memory_key(model, digest), array.array("f", embedding), float("inf"))
+            embedding_cache_db_hits.inc(len(rows))
+        return found
+
+    async def put_many(self, model: str, embeddings: Dict[str, List[float]]):
+        """Store new embeddings in both tiers."""
+        if not embeddings:
+            return
+        for digest, embedding in embeddings.items():
+            await self.memory.set(self._memory_key(model, digest), array.array("f", embedding), float("inf"))
+        async with async_session_maker() as session:
+            await session.execute(
+                pg_insert(EmbeddingCacheEntry)
+                .values([
+                    {"model": model, "text_hash": digest, "embedding": embedding}
+                    for digest, embedding in embeddings.items()
+                ])
+                .on_conflict_do_nothing(index_elements=[EmbeddingCacheEntry.model, EmbeddingCacheEntry.text_hash])
+            )
+            await session.commit()
+
+    async def embed_many(self, texts: List[str], embed_batch: EmbedBatch, model: str = DEFAULT_EMBEDDING_MODEL) -> List[List[float]]:
+        """
+        Embed texts, calling `embed_batch` only for texts not cached yet.
+
+        Args:
+            texts: Texts to embed
+            embed_batch: Provider function embedding a list of texts in one request
+            model: Model name the cache entries are stored under
+
+        Returns:
+            One embedding per text, in the same order
+        """
+        digests = [text_hash(text) for text in texts]
+        try:
+            found = await self.get_many(model, list(dict.fromkeys(digests)))
+        except Exception as e:
+            print(f"Warning: Embedding cache lookup failed: {e}")
+            found = {}
+
+        # Each distinct uncached text is sent to the provider once
+        to_embed: Dict[str, str] = {}
+        for digest, text in zip(digests, texts):
+            if digest not in found:
+                to_embed.setdefault(digest, text)
+        if to_embed:
+            embedding_cache_misses.inc(len(to_embed))
+            new_embeddings = dict(zip(to_embed, await embed_batch(list(to_embed.values()))))
+            found.update(new_embeddings)
+            try:
+                await self.put_many(model, new_embeddings)
+            except Exception as e:
+                print(f"Warning: Could not store embeddings in cache: {e}")
+
+        return [found[digest] for digest in digests]
+
+    async def embed(self, text: str, embed_batch: EmbedBatch, model: str = DEFAULT_EMBEDDING_MODEL) -> List[float]:
+        """Single-text version of embed_many."""
+        return (await self.embed_many([text], embed_batch, model))[0]
+
+
+embedding_cache = EmbeddingCache(max_entries=int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "4096")))
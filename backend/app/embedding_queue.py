@@ -0,0 +1,110 @@
+import os
+import asyncio
+from typing import List, Optional
+from sqlalchemy import select, update
+
+from app.db import async_session_maker, Complaint
+from app.metrics import metrics
+
+# "inline": embed before the complaint is saved; "background": save first, embed later
+EMBEDDING_MODE = os.getenv("EMBEDDING_MODE", "inline").lower()
+
+embeddings_pending = metrics.gauge("embedding_queue_pending", "Complaints waiting for a background embedding")
+embeddings_written = metrics.counter("embedding_queue_written", "Background embeddings stored")
+embeddings_failed = metrics.counter("embedding_queue_failed", "Background embeddings that could not be generated")
+
+
+async def store_embedding(complaint_id, embedding: List[float]):
+    """Write a complaint's embedding and cluster without touching updated_at."""
+    # Import here to avoid circular imports
+    from app.complaint_clusters import assign_cluster
+    from app.cache import pulse_cache
+
+    async with async_session_maker() as session:
+        complaint = (await session.execute(
+            select(Complaint.planning_area, Complaint.category, Complaint.title).where(Complaint.id == complaint_id)
+        )).first()
+        if complaint is None:
+            return
+
+        cluster_id = None
+        try:
+            async with session.begin_nested():
+                cluster_id = await assign_cluster(session, embedding, complaint.planning_area, complaint.category, complaint.title)
+        except Exception as e:
+            print(f"Warning: Could not assign complaint cluster: {e}")
+
+        await session.execute(
+            update(Complaint)
+            .where(Complaint.id == complaint_id)
+            # Keep updated_at (and the ETags/rollups derived from it) unchanged
+            .values(embedding=embedding, cluster_id=cluster_id, updated_at=Complaint.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+
+    if cluster_id is not None:
+        # Listings (including ?cluster_id= member lists) show cluster_id too
+        await pulse_cache.invalidate("/complaints", "/clusters", "/analytics/map-data")
+
+
+class EmbeddingQueue:
+    """
+    Fills in complaint embeddings after the complaint has been committed.
+
+    `save_complaint` enqueues (complaint_id, text) in background mode and
+    returns straight away; `workers` tasks call the embedding API and store
+    the vectors. Complaints still queued at shutdown keep a NULL embedding
+    and are left out of similarity search.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+
+    def enqueue(self, complaint_id, text: str):
+        self._queue.put_nowait((complaint_id, text))
+        embeddings_pending.set(self._queue.qsize())
+
+    async def _embed(self, complaint_id, text: str):
+        # Import here to avoid circular imports
+        from agent.utils.get_embedding_async import get_embeddings_async
+        from app.embedding_cache import embedding_cache
+
+        embedding = await embedding_cache.embed(text, get_embeddings_async)
+        await store_embedding(complaint_id, embedding)
+        embeddings_written.inc()
+
+    async def _run_worker(self):
+        while True:
+            complaint_id, text = await self._queue.get()
+            embeddings_pending.set(self._queue.qsize())
+            try:
+                await self._embed(complaint_id, text)
+            except Exception as e:
+                embeddings_failed.inc()
+                print(f"Warning: Could not generate embedding for complaint {complaint_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def start(self):
+        """Start the workers (called at application startup)."""
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._run_worker()) for _ in range(self.workers)]
+
+    async def stop(self, timeout: Optional[float] = 10.0):
+        """Give queued embeddings `timeout` seconds to finish, then stop the workers."""
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            print(f"Warning: {self._queue.qsize()} complaint(s) left without an embedding")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+embedding_queue = EmbeddingQueue(workers=int(os.getenv("EMBEDDING_WORKERS", "2")))
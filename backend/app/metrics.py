@@ -0,0 +1,134 @@
+import time
+from collections import deque
+from typing import Dict
+
+
+class Counter:
+    """Monotonically increasing count."""
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self.value = 0
+
+    def inc(self, amount: int = 1):
+        self.value += amount
+
+    def snapshot(self) -> Dict:
+        return {"type": "counter", "description": self.description, "value": self.value}
+
+
+class Gauge:
+    """Point-in-time value that can go up and down."""
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+    def snapshot(self) -> Dict:
+        return {"type": "gauge", "description": self.description, "value": self.value}
+
+
+class Histogram:
+    """
+    Distribution of observed values.
+
+    Keeps running count/sum/max plus a bounded window of recent samples
+    for percentile estimates.
+    """
+
+    def __init__(self, name: str, description: str = "", window: int = 1024):
+        self.name = name
+        self.description = description
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=window)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.samples.append(value)
+
+    def time(self):
+        """Context manager that observes the elapsed wall time in seconds."""
+        return _Timer(self)
+
+    def _percentile(self, ordered: list, pct: float) -> float:
+        if not ordered:
+            return 0.0
+        index = min(len(ordered) - 1, int(round(pct * (len(ordered) - 1))))
+        return ordered[index]
+
+    def snapshot(self) -> Dict:
+        ordered = sorted(self.samples)
+        return {
+            "type": "histogram",
+            "description": self.description,
+            "count": self.count,
+            "sum": round(self.total, 6),
+            "avg": round(self.total / self.count, 6) if self.count else 0.0,
+            "max": round(self.max, 6),
+            "p50": round(self._percentile(ordered, 0.50), 6),
+            "p95": round(self._percentile(ordered, 0.95), 6),
+            "p99": round(self._percentile(ordered, 0.99), 6),
+        }
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class MetricsRegistry:
+    """Process-local registry of named metrics."""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def _get_or_create(self, cls, name: str, description: str, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = cls(name, description, **kwargs)
+            self._metrics[name] = metric
+        return metric
+
+    def counter(self, name: str, description: str = "") -> Counter:
+        return self._get_or_create(Counter, name, description)
+
+    def gauge(self, name: str, description: str = "") -> Gauge:
+        return self._get_or_create(Gauge, name, description)
+
+    def histogram(self, name: str, description: str = "", window: int = 1024) -> Histogram:
+        return self._get_or_create(Histogram, name, description, window=window)
+
+    def snapshot(self) -> Dict:
+        return {name: metric.snapshot() for name, metric in sorted(self._metrics.items())}
+
+
+metrics = MetricsRegistry()
+
+# Chat streaming metrics
+chat_stream_ttft = metrics.histogram(
+    "chat_stream_ttft_seconds",
+    "Time from opening /api/chat/stream/{task_id} to the first content chunk",
+)
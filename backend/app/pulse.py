@@ -1,30 +1,132 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, desc, text
+from sqlalchemy.orm import undefer, load_only
+from sqlalchemy import select, update, func, and_, desc, text, tuple_
 from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
-from app.db import get_async_session, Complaint, ComplaintComment, ComplaintVote, User
+from datetime import datetime, timedelta, timezone
+from app.db import get_async_session, Complaint, ComplaintCluster, ComplaintComment, ComplaintVote, ComplaintAnalytics, User
+from app.analytics_rollup import analytics_rollup_job, day_start
 from app.users import current_active_user
+from app.cache import pulse_cache
+from app.responses import FastJSONResponse
+from app.view_counter import view_counter
+from app.vector_search import similarity_search
 import json
+import base64
 import random
 import uuid
 
 router = APIRouter(prefix="/pulse", tags=["pulse"])
 
 
-@router.get("/complaints")
+async def complaints_etag(session: AsyncSession, *conditions) -> str:
+    """
+    Version token for a filtered set of complaints.
+
+    Row count plus the latest updated_at changes whenever a complaint in the
+    set is added or modified, without building the response itself.
+    """
+    result = await session.execute(
+        select(func.count(Complaint.id), func.max(Complaint.updated_at)).where(*conditions)
+    )
+    count, last_updated = result.one()
+    version = int(last_updated.timestamp() * 1_000_000) if last_updated else 0
+    return f'"{count:x}-{version:x}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match header already names this ETag."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def set_etag(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    # Let browsers keep the body but revalidate on every poll
+    response.headers["Cache-Control"] = "no-cache"
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+def encode_cursor(created_at: datetime, complaint_id) -> str:
+    """Opaque keyset cursor pointing just after the given row."""
+    payload = json.dumps([created_at.isoformat(), str(complaint_id)])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Decode a cursor from encode_cursor into (created_at, id)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, complaint_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), uuid.UUID(complaint_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+# Columns returned by complaint listings; the text, history and embedding stay in the database
+LISTING_COLUMNS = (
+    Complaint.id,
+    Complaint.title,
+    Complaint.category,
+    Complaint.subcategory,
+    Complaint.urgency,
+    Complaint.status,
+    Complaint.location_description,
+    Complaint.planning_area,
+    Complaint.postal_code,
+    Complaint.latitude,
+    Complaint.longitude,
+    Complaint.sentiment_score,
+    Complaint.tags,
+    Complaint.keywords,
+    Complaint.upvote_count,
+    Complaint.comment_count,
+    Complaint.view_count,
+    Complaint.cluster_id,
+    Complaint.created_at,
+    Complaint.resolved_at,
+)
+
+
+def listing_row_to_dict(row) -> Dict[str, Any]:
+    """Convert a LISTING_COLUMNS row to its JSON-ready dict."""
+    complaint_dict = dict(row._mapping)
+    complaint_dict["id"] = str(row.id)
+    complaint_dict["cluster_id"] = str(row.cluster_id) if row.cluster_id else None
+    complaint_dict["created_at"] = row.created_at.isoformat()
+    complaint_dict["resolved_at"] = row.resolved_at.isoformat() if row.resolved_at else None
+    return complaint_dict
+
+
+@router.get("/complaints", response_class=FastJSONResponse)
+@pulse_cache.cached("/complaints", response_class=FastJSONResponse)
 async def get_complaints(
-    limit: int = Query(50, le=100),
+    limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
     category: Optional[str] = None,
     planning_area: Optional[str] = None,
     urgency: Optional[str] = None,
+    cluster_id: Optional[uuid.UUID] = None,
     session: AsyncSession = Depends(get_async_session)
 ):
-    """Get paginated list of complaints with optional filters."""
+    """
+    Get paginated list of complaints with optional filters.
 
-    # Build query with filters
-    query = select(Complaint).order_by(desc(Complaint.created_at))
+    Pass the returned `next_cursor` as `cursor` to fetch the next page by
+    keyset instead of OFFSET; deep pages then cost the same as the first.
+    """
+    if cursor and offset:
+        raise HTTPException(status_code=400, detail="Use either cursor or offset, not both")
+
+    # Build query with filters, selecting only the columns the listing returns
+    query = select(*LISTING_COLUMNS).order_by(desc(Complaint.created_at), desc(Complaint.id))
 
     if category:
         query = query.where(Complaint.category == category)
@@ -32,40 +134,30 @@ async def get_complaints(
         query = query.where(Complaint.planning_area == planning_area)
     if urgency:
         query = query.where(Complaint.urgency == urgency)
+    if cluster_id:
+        query = query.where(Complaint.cluster_id == cluster_id)
 
     # Apply pagination
-    query = query.offset(offset).limit(limit)
+    if cursor:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(Complaint.created_at, Complaint.id) < tuple_(cursor_created_at, cursor_id)
+        )
+    else:
+        query = query.offset(offset)
+    query = query.limit(limit)
 
     result = await session.execute(query)
-    complaints = result.scalars().all()
+    rows = result.all()
 
-    # Convert to dict format for JSON response
-    complaint_list = []
-    for complaint in complaints:
-        complaint_dict = {
-            "id": str(complaint.id),
-            "title": complaint.title,
-            "category": complaint.category,
-            "subcategory": complaint.subcategory,
-            "urgency": complaint.urgency,
-            "status": complaint.status,
-            "location_description": complaint.location_description,
-            "planning_area": complaint.planning_area,
-            "postal_code": complaint.postal_code,
-            "latitude": complaint.latitude,
-            "longitude": complaint.longitude,
-            "sentiment_score": complaint.sentiment_score,
-            "tags": complaint.tags,
-            "keywords": complaint.keywords,
-            "upvote_count": complaint.upvote_count,
-            "comment_count": complaint.comment_count,
-            "view_count": complaint.view_count,
-            "created_at": complaint.created_at.isoformat(),
-            "resolved_at": complaint.resolved_at.isoformat() if complaint.resolved_at else None
-        }
-        complaint_list.append(complaint_dict)
+    # Rows map straight to response dicts, no ORM entities involved
+    complaint_list = [listing_row_to_dict(row) for row in rows]
 
-    return {"complaints": complaint_list}
+    next_cursor = None
+    if rows and len(rows) == limit:
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    return {"complaints": complaint_list, "next_cursor": next_cursor}
 
 
 @router.get("/complaints/{complaint_id}")
@@ -75,18 +167,20 @@ async def get_complaint_detail(
 ):
     """Get detailed information about a specific complaint."""
 
-    # Get complaint
+    # Get complaint, including the deferred text and conversation history
     result = await session.execute(
-        select(Complaint).where(Complaint.id == complaint_id)
+        select(Complaint)
+        .options(undefer(Complaint.original_text), undefer(Complaint.conversation_history))
+        .where(Complaint.id == complaint_id)
     )
     complaint = result.scalar_one_or_none()
 
     if not complaint:
         raise HTTPException(status_code=404, detail="Complaint not found")
 
-    # Increment view count
-    complaint.view_count += 1
-    await session.commit()
+    # Count the view in memory; it is written later in a batch, keeping this a pure read
+    view_counter.record(complaint.id)
+    view_count = (complaint.view_count or 0) + view_counter.pending(complaint.id)
 
     # Get comments with user info
     comments_result = await session.execute(
@@ -118,7 +212,8 @@ async def get_complaint_detail(
         "keywords": complaint.keywords,
         "upvote_count": complaint.upvote_count,
         "comment_count": complaint.comment_count,
-        "view_count": complaint.view_count,
+        "view_count": view_count,
+        "cluster_id": str(complaint.cluster_id) if complaint.cluster_id else None,
         "created_at": complaint.created_at.isoformat(),
         "updated_at": complaint.updated_at.isoformat(),
         "resolved_at": complaint.resolved_at.isoformat() if complaint.resolved_at else None,
@@ -138,69 +233,110 @@ async def get_complaint_detail(
     return complaint_detail
 
 
-@router.get("/analytics/overview")
-async def get_analytics_overview(
-    days: int = Query(30, ge=1, le=365),
-    session: AsyncSession = Depends(get_async_session)
-):
-    """Get overview analytics for the specified time period."""
-
-    start_date = datetime.utcnow() - timedelta(days=days)
-
-    # Total complaints in period
-    total_result = await session.execute(
-        select(func.count(Complaint.id))
-        .where(Complaint.created_at >= start_date)
-    )
-    total_complaints = total_result.scalar()
+def build_analytics_query(start: datetime, end: Optional[datetime] = None):
+    """
+    Single-statement aggregate over complaints created in [start, end).
+
+    One scan of the date range feeds every breakdown through GROUPING SETS;
+    the `grouping_set` column says which breakdown each row belongs to.
+    """
+    end_clause = "AND created_at < :end" if end is not None else ""
+    query = text(f"""
+        WITH scoped AS (
+            SELECT category, planning_area, sentiment_score,
+                   (created_at AT TIME ZONE 'UTC')::date AS day
+            FROM complaints
+            WHERE created_at >= :start {end_clause}
+        )
+        SELECT CASE GROUPING(category, planning_area, day)
+                   WHEN 7 THEN 'total'
+                   WHEN 3 THEN 'category'
+                   WHEN 5 THEN 'location'
+                   ELSE 'day'
+               END AS grouping_set,
+               category, planning_area, day,
+               COUNT(*) AS complaints,
+               COALESCE(SUM(sentiment_score), 0) AS sentiment_sum,
+               COUNT(sentiment_score) AS sentiment_count
+        FROM scoped
+        GROUP BY GROUPING SETS ((), (category), (planning_area), (day))
+    """)
+    params = {"start": start}
+    if end is not None:
+        params["end"] = end
+    return query.bindparams(**params)
+
+
+async def aggregate_complaints(session: AsyncSession, start: datetime, end: Optional[datetime] = None) -> Dict[str, Any]:
+    """Run the grouped analytics query and collect its rows into totals."""
+    result = await session.execute(build_analytics_query(start, end))
+
+    totals = {
+        "total_complaints": 0,
+        "category_breakdown": {},
+        "location_breakdown": {},
+        "sentiment_sum": 0.0,
+        "sentiment_count": 0,
+        "daily_counts": {},
+    }
+    for row in result:
+        if row.grouping_set == "total":
+            totals["total_complaints"] = row.complaints
+            totals["sentiment_sum"] = float(row.sentiment_sum)
+            totals["sentiment_count"] = row.sentiment_count
+        elif row.grouping_set == "category":
+            totals["category_breakdown"][row.category] = row.complaints
+        elif row.grouping_set == "location" and row.planning_area is not None:
+            totals["location_breakdown"][row.planning_area] = row.complaints
+        elif row.grouping_set == "day":
+            totals["daily_counts"][row.day] = row.complaints
+    return totals
+
+
+def merge_analytics(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Add up analytics totals, e.g. daily rollups plus a live tail."""
+    merged = {
+        "total_complaints": 0,
+        "category_breakdown": {},
+        "location_breakdown": {},
+        "sentiment_sum": 0.0,
+        "sentiment_count": 0,
+        "daily_counts": {},
+    }
+    for part in parts:
+        merged["total_complaints"] += part["total_complaints"]
+        for category, count in part["category_breakdown"].items():
+            merged["category_breakdown"][category] = merged["category_breakdown"].get(category, 0) + count
+        for area, count in part["location_breakdown"].items():
+            merged["location_breakdown"][area] = merged["location_breakdown"].get(area, 0) + count
+        merged["sentiment_sum"] += part["sentiment_sum"]
+        merged["sentiment_count"] += part["sentiment_count"]
+        for day, count in part["daily_counts"].items():
+            merged["daily_counts"][day] = merged["daily_counts"].get(day, 0) + count
+    return merged
+
+
+def format_analytics_overview(totals: Dict[str, Any], days: int) -> Dict[str, Any]:
+    """Shape analytics totals into the /analytics/overview response."""
 
     # Category breakdown
-    category_result = await session.execute(
-        select(Complaint.category, func.count(Complaint.id))
-        .where(Complaint.created_at >= start_date)
-        .group_by(Complaint.category)
-        .order_by(desc(func.count(Complaint.id)))
-    )
-    category_breakdown = {row[0]: row[1] for row in category_result}
+    category_breakdown = dict(sorted(totals["category_breakdown"].items(), key=lambda item: item[1], reverse=True))
 
     # Location breakdown (top 10 planning areas)
-    location_result = await session.execute(
-        select(Complaint.planning_area, func.count(Complaint.id))
-        .where(and_(
-            Complaint.created_at >= start_date,
-            Complaint.planning_area.isnot(None)
-        ))
-        .group_by(Complaint.planning_area)
-        .order_by(desc(func.count(Complaint.id)))
-        .limit(10)
-    )
-    location_breakdown = {row[0]: row[1] for row in location_result}
+    location_breakdown = dict(sorted(totals["location_breakdown"].items(), key=lambda item: item[1], reverse=True)[:10])
 
     # Average sentiment
-    sentiment_result = await session.execute(
-        select(func.avg(Complaint.sentiment_score))
-        .where(and_(
-            Complaint.created_at >= start_date,
-            Complaint.sentiment_score.isnot(None)
-        ))
-    )
-    avg_sentiment = sentiment_result.scalar() or 0.0
+    avg_sentiment = totals["sentiment_sum"] / totals["sentiment_count"] if totals["sentiment_count"] else 0.0
 
     # Daily trend data
-    daily_result = await session.execute(
-        text("""
-        SELECT DATE(created_at) as date, COUNT(*) as count
-        FROM complaints
-        WHERE created_at >= :start_date
-        GROUP BY DATE(created_at)
-        ORDER BY date
-        """),
-        {"start_date": start_date}
-    )
-    daily_trend = [{"date": row[0].isoformat(), "count": row[1]} for row in daily_result]
+    daily_trend = [
+        {"date": day.isoformat(), "count": count}
+        for day, count in sorted(totals["daily_counts"].items())
+        if count
+    ]
 
     return {
-        "total_complaints": total_complaints,
+        "total_complaints": totals["total_complaints"],
         "category_breakdown": category_breakdown,
         "location_breakdown": location_breakdown,
         "average_sentiment": round(avg_sentiment, 2),
@@ -209,10 +345,97 @@ async def get_analytics_overview(
     }
 
 
-@router.get("/analytics/map-data")
-async def get_map_data(
+def overview_start(days: int) -> datetime:
+    """First UTC day included in an overview of the last `days` days."""
+    return day_start(datetime.now(timezone.utc) - timedelta(days=days))
+
+
+async def analytics_overview_etag(session: AsyncSession, days: int) -> str:
+    """
+    Version token for the overview, built from the same data as the body.
+
+    Past days come from the rollups, so their part is the rollup count and
+    latest refreshed_at (a late rollup refresh changes it even when the raw
+    complaints didn't); today is the live-tail complaints ETag. The day is
+    included because the window moves at midnight.
+    """
+    today = day_start(datetime.now(timezone.utc))
+    result = await session.execute(
+        select(func.count(ComplaintAnalytics.id), func.max(ComplaintAnalytics.refreshed_at))
+        .where(and_(
+            ComplaintAnalytics.date >= overview_start(days),
+            ComplaintAnalytics.date < today
+        ))
+    )
+    count, last_refreshed = result.one()
+    version = int(last_refreshed.timestamp() * 1_000_000) if last_refreshed else 0
+    live_tail = (await complaints_etag(session, Complaint.created_at >= today)).strip('"')
+    return f'"{today.toordinal():x}-{count:x}-{version:x}-{live_tail}"'
+
+
+async def compute_analytics_overview(session: AsyncSession, days: int) -> Dict[str, Any]:
+    """
+    Compute overview analytics for the specified time period.
+
+    Past days are read from the `complaint_analytics` daily rollups and only
+    today is aggregated live, so the cost doesn't grow with the complaints
+    table. The period is aligned to whole UTC days.
+    """
+
+    today = day_start(datetime.now(timezone.utc))
+    start_day = overview_start(days)
+
+    # Closed days from the rollups
+    rollup_result = await session.execute(
+        select(ComplaintAnalytics)
+        .where(and_(
+            ComplaintAnalytics.date >= start_day,
+            ComplaintAnalytics.date < today
+        ))
+    )
+    parts = [
+        {
+            "total_complaints": row.total_complaints or 0,
+            "category_breakdown": row.category_breakdown or {},
+            "location_breakdown": row.location_breakdown or {},
+            "sentiment_sum": row.sentiment_sum or 0.0,
+            "sentiment_count": row.sentiment_count or 0,
+            "daily_counts": {row.date.date(): row.total_complaints or 0},
+        }
+        for row in rollup_result.scalars()
+    ]
+
+    # Live tail for today, in one grouped statement
+    parts.append(await aggregate_complaints(session, today))
+
+    return format_analytics_overview(merge_analytics(parts), days)
+
+
+@router.get("/analytics/overview")
+async def get_analytics_overview(
+    request: Request,
+    response: Response,
+    days: int = Query(30, ge=1, le=365),
     session: AsyncSession = Depends(get_async_session)
 ):
+    """Get overview analytics for the specified time period (supports If-None-Match)."""
+    params = {"days": days}
+
+    etag = await pulse_cache.get_or_compute(
+        pulse_cache.make_key("/analytics/overview#etag", params),
+        lambda: analytics_overview_etag(session, days)
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    set_etag(response, etag)
+    return await pulse_cache.get_or_compute(
+        pulse_cache.make_key("/analytics/overview", params),
+        lambda: compute_analytics_overview(session, days)
+    )
+
+
+async def compute_map_data(session: AsyncSession) -> Dict[str, Any]:
     """Get complaint data for map visualization."""
 
     # Get complaints with location data
@@ -281,18 +504,196 @@ async def get_map_data(
     return {"map_data": list(area_data.values())}
 
 
+async def clusters_etag(session: AsyncSession, *conditions) -> str:
+    """Version token for a set of clusters (joining one moves its last_seen)."""
+    result = await session.execute(
+        select(func.count(ComplaintCluster.id), func.max(ComplaintCluster.last_seen)).where(*conditions)
+    )
+    count, last_seen = result.one()
+    version = int(last_seen.timestamp() * 1_000_000) if last_seen else 0
+    return f'"c{count:x}-{version:x}"'
+
+
+def cluster_to_dict(cluster) -> Dict[str, Any]:
+    return {
+        "id": str(cluster.id),
+        "title": cluster.title,
+        "category": cluster.category,
+        "planning_area": cluster.planning_area,
+        "complaint_count": cluster.complaint_count,
+        "first_seen": cluster.first_seen.isoformat(),
+        "last_seen": cluster.last_seen.isoformat(),
+    }
+
+
+async def cluster_map_etag(session: AsyncSession) -> str:
+    """Clusters ETag plus the complaints ETag, since unclustered complaints are on the map too."""
+    clusters = (await clusters_etag(session)).strip('"')
+    complaints = (await complaints_etag(session, Complaint.planning_area.isnot(None))).strip('"')
+    return f'"{clusters}-{complaints}"'
+
+
+async def compute_cluster_map_data(session: AsyncSession) -> Dict[str, Any]:
+    """
+    Map data with one entry per incident cluster instead of per complaint.
+
+    Complaints without a cluster (saved before clustering existed,
+    backfilled, or without an embedding) count as clusters of one, so the
+    area totals match the per-complaint map.
+    """
+    # Area totals over everything: clusters plus unclustered complaints as singletons
+    totals_result = await session.execute(text("""
+        SELECT planning_area, category, SUM(complaint_count) AS complaints, COUNT(*) AS clusters
+        FROM complaint_clusters
+        GROUP BY planning_area, category
+        UNION ALL
+        SELECT planning_area, category, COUNT(*) AS complaints, COUNT(*) AS clusters
+        FROM complaints
+        WHERE cluster_id IS NULL AND planning_area IS NOT NULL
+        GROUP BY planning_area, category
+    """))
+
+    area_data = {}
+    for row in totals_result:
+        area_info = area_data.setdefault(row.planning_area, {
+            "planning_area": row.planning_area,
+            "total_complaints": 0,
+            "total_clusters": 0,
+            "categories": {},
+            "clusters": []
+        })
+        area_info["total_complaints"] += int(row.complaints)
+        area_info["total_clusters"] += int(row.clusters)
+        area_info["categories"][row.category] = area_info["categories"].get(row.category, 0) + int(row.complaints)
+
+    # Entries: the most recent clusters and unclustered complaints
+    clusters_result = await session.execute(
+        select(ComplaintCluster)
+        .order_by(desc(ComplaintCluster.last_seen))
+        .limit(1000)  # Limit for performance
+    )
+    singles_result = await session.execute(
+        select(Complaint.id, Complaint.title, Complaint.category, Complaint.planning_area, Complaint.created_at)
+        .where(Complaint.cluster_id.is_(None), Complaint.planning_area.isnot(None))
+        .order_by(desc(Complaint.created_at))
+        .limit(1000)
+    )
+    entries = [cluster_to_dict(cluster) for cluster in clusters_result.scalars().all()]
+    entries += [
+        {
+            "id": None,
+            "complaint_id": str(row.id),
+            "title": row.title,
+            "category": row.category,
+            "planning_area": row.planning_area,
+            "complaint_count": 1,
+            "first_seen": row.created_at.isoformat(),
+            "last_seen": row.created_at.isoformat(),
+        }
+        for row in singles_result
+    ]
+    for entry in entries:
+        if entry["planning_area"] in area_data:
+            area_data[entry["planning_area"]]["clusters"].append(entry)
+
+    # Largest incidents first, then most recent (limit per area)
+    for area_info in area_data.values():
+        area_info["clusters"] = sorted(
+            area_info["clusters"], key=lambda c: (c["complaint_count"], c["last_seen"]), reverse=True
+        )[:20]
+
+    return {"map_data": list(area_data.values())}
+
+
+@router.get("/analytics/map-data")
+async def get_map_data(
+    request: Request,
+    response: Response,
+    group_by: str = "complaint",
+    session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Get complaint data for map visualization (supports If-None-Match).
+
+    With `group_by=cluster`, each area lists its incident clusters instead
+    of individual complaints, so a burst of reports about one incident is
+    a single entry.
+    """
+    if group_by not in ("complaint", "cluster"):
+        raise HTTPException(status_code=400, detail="group_by must be 'complaint' or 'cluster'")
+
+    if group_by == "cluster":
+        params = {"group_by": group_by}
+        compute_etag = lambda: cluster_map_etag(session)
+        compute = lambda: compute_cluster_map_data(session)
+    else:
+        params = None
+        compute_etag = lambda: complaints_etag(session, Complaint.planning_area.isnot(None))
+        compute = lambda: compute_map_data(session)
+
+    etag = await pulse_cache.get_or_compute(pulse_cache.make_key("/analytics/map-data#etag", params), compute_etag)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    set_etag(response, etag)
+    return await pulse_cache.get_or_compute(pulse_cache.make_key("/analytics/map-data", params), compute)
+
+
+@router.get("/clusters", response_class=FastJSONResponse)
+@pulse_cache.cached("/clusters", response_class=FastJSONResponse)
+async def get_clusters(
+    limit: int = Query(50, ge=1, le=100),
+    days: int = Query(7, ge=1, le=365),
+    min_size: int = Query(2, ge=1),
+    category: Optional[str] = None,
+    planning_area: Optional[str] = None,
+    session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Get the largest recent incident clusters.
+
+    Members of a cluster can be listed with /complaints?cluster_id=...
+    """
+    query = (
+        select(ComplaintCluster)
+        .where(
+            ComplaintCluster.last_seen >= datetime.now(timezone.utc) - timedelta(days=days),
+            ComplaintCluster.complaint_count >= min_size,
+        )
+        .order_by(desc(ComplaintCluster.complaint_count), desc(ComplaintCluster.last_seen))
+        .limit(limit)
+    )
+    if category:
+        query = query.where(ComplaintCluster.category == category)
+    if planning_area:
+        query = query.where(ComplaintCluster.planning_area == planning_area)
+
+    result = await session.execute(query)
+    return {"clusters": [cluster_to_dict(cluster) for cluster in result.scalars().all()]}
+
+
 @router.get("/similar-complaints/{complaint_id}")
 async def get_similar_complaints(
     complaint_id: str,
-    limit: int = Query(5, le=20),
+    limit: int = Query(5, ge=1, le=50),
+    category: Optional[str] = None,
+    planning_area: Optional[str] = None,
+    status: Optional[str] = None,
+    days: Optional[int] = Query(None, ge=1, le=365),
     session: AsyncSession = Depends(get_async_session)
 ):
-    """Find similar complaints using vector similarity or category/keyword matching."""
+    """
+    Find similar complaints using vector similarity or category/keyword matching.
+
+    Optional filters narrow the search to one category, planning area,
+    status or the last `days` days.
+    """
     from app.db import HAS_VECTOR
 
-    # Get the target complaint
+    # Get the target complaint (only what the search needs)
     result = await session.execute(
         select(Complaint)
+        .options(load_only(Complaint.category, Complaint.embedding))
         .where(Complaint.id == complaint_id)
     )
     target_complaint = result.scalar_one_or_none()
@@ -300,51 +701,36 @@ async def get_similar_complaints(
     if not target_complaint:
         raise HTTPException(status_code=404, detail="Complaint not found")
 
-    if HAS_VECTOR and target_complaint.embedding:
+    if HAS_VECTOR and target_complaint.embedding is not None:
         # Use vector similarity if available
         try:
-            similar_result = await session.execute(
-                text("""
-                SELECT id, title, category, urgency, created_at,
-                       1 - (embedding <=> :target_embedding) as similarity
-                FROM complaints
-                WHERE id != :complaint_id AND embedding IS NOT NULL
-                ORDER BY embedding <=> :target_embedding
-                LIMIT :limit
-                """),
-                {
-                    "target_embedding": target_complaint.embedding,
-                    "complaint_id": complaint_id,
-                    "limit": limit
-                }
-            )
-
-            similar_complaints = [
-                {
-                    "id": str(row[0]),
-                    "title": row[1],
-                    "category": row[2],
-                    "urgency": row[3],
-                    "created_at": row[4].isoformat(),
-                    "similarity": round(float(row[5]), 3)
-                }
-                for row in similar_result
-            ]
-
+            async with session.begin_nested():
+                similar_complaints, _ = await similarity_search(
+                    session, target_complaint.embedding, limit,
+                    category=category, planning_area=planning_area, status=status, days=days,
+                    exclude_id=complaint_id,
+                )
             return {"similar_complaints": similar_complaints}
         except Exception as e:
             print(f"Vector search failed, falling back to keyword matching: {e}")
 
     # Fallback to category and keyword-based similarity
-    similar_result = await session.execute(
+    query = (
         select(Complaint.id, Complaint.title, Complaint.category, Complaint.urgency, Complaint.created_at)
         .where(and_(
             Complaint.id != complaint_id,
-            Complaint.category == target_complaint.category
+            Complaint.category == (category or target_complaint.category)
         ))
         .order_by(desc(Complaint.created_at))
         .limit(limit)
     )
+    if planning_area:
+        query = query.where(Complaint.planning_area == planning_area)
+    if status:
+        query = query.where(Complaint.status == status)
+    if days:
+        query = query.where(Complaint.created_at >= datetime.now(timezone.utc) - timedelta(days=days))
+    similar_result = await session.execute(query)
 
     similar_complaints = [
         {
@@ -361,6 +747,64 @@ async def get_similar_complaints(
     return {"similar_complaints": similar_complaints}
 
 
+@router.get("/similar")
+async def search_similar(
+    q: str = Query(..., min_length=3, max_length=2000),
+    limit: int = Query(10, ge=1, le=50),
+    category: Optional[str] = None,
+    planning_area: Optional[str] = None,
+    status: Optional[str] = None,
+    days: Optional[int] = Query(None, ge=1, le=365),
+    user: User = Depends(current_active_user),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Find complaints similar to a piece of text, e.g. "similar complaints
+    near me this month" with planning_area and days=30.
+
+    Requires a signed-in user: every new `q` costs an embedding API call.
+    """
+    from app.db import HAS_VECTOR
+    # Import here to avoid circular imports
+    from agent.utils.get_embedding_async import get_embeddings_async
+    from app.embedding_cache import embedding_cache
+
+    if not HAS_VECTOR:
+        raise HTTPException(status_code=503, detail="Vector search is not available")
+
+    try:
+        embedding = await embedding_cache.embed(q, get_embeddings_async)
+    except Exception as e:
+        print(f"Warning: Could not embed search text: {e}")
+        raise HTTPException(status_code=503, detail="Could not embed search text")
+
+    results, strategy = await similarity_search(
+        session, embedding, limit,
+        category=category, planning_area=planning_area, status=status, days=days,
+    )
+    return {"similar_complaints": results, "strategy": strategy}
+
+
+async def increment_counter(session: AsyncSession, complaint_id, column, amount: int = 1) -> Optional[int]:
+    """
+    Atomically add `amount` to a complaint counter column.
+
+    Runs a single UPDATE ... SET x = x + n RETURNING x, so concurrent
+    requests never lose increments.
+
+    Returns:
+        The new counter value, or None if the complaint doesn't exist
+    """
+    result = await session.execute(
+        update(Complaint)
+        .where(Complaint.id == complaint_id)
+        .values({column: func.coalesce(column, 0) + amount})
+        .returning(column)
+        .execution_options(synchronize_session=False)
+    )
+    return result.scalar_one_or_none()
+
+
 @router.post("/complaints/{complaint_id}/vote")
 async def vote_on_complaint(
     complaint_id: str,
@@ -370,18 +814,19 @@ async def vote_on_complaint(
 ):
     """Vote on a complaint."""
 
+    vote_type = vote_data.get("vote_type")
+    if vote_type not in ["upvote", "downvote"]:
+        raise HTTPException(status_code=400, detail="Invalid vote type")
+
     # Check if complaint exists
     complaint_result = await session.execute(
-        select(Complaint).where(Complaint.id == complaint_id)
+        select(Complaint.id).where(Complaint.id == complaint_id)
     )
-    complaint = complaint_result.scalar_one_or_none()
-
-    if not complaint:
+    if complaint_result.scalar_one_or_none() is None:
         raise HTTPException(status_code=404, detail="Complaint not found")
 
-    vote_type = vote_data.get("vote_type")
-    if vote_type not in ["upvote", "downvote"]:
-        raise HTTPException(status_code=400, detail="Invalid vote type")
+    # Net change to the complaint's upvote count
+    upvote_delta = 0
 
     # Check for existing vote
     existing_vote_result = await session.execute(
@@ -398,15 +843,15 @@ async def vote_on_complaint(
         if existing_vote.vote_type != vote_type:
             # Change vote type
             if existing_vote.vote_type == "upvote":
-                complaint.upvote_count -= 1
+                upvote_delta -= 1
             if vote_type == "upvote":
-                complaint.upvote_count += 1
+                upvote_delta += 1
 
             existing_vote.vote_type = vote_type
         else:
             # Same vote type - remove vote
             if vote_type == "upvote":
-                complaint.upvote_count -= 1
+                upvote_delta -= 1
             await session.delete(existing_vote)
     else:
         # Create new vote
@@ -418,11 +863,15 @@ async def vote_on_complaint(
         session.add(new_vote)
 
         if vote_type == "upvote":
-            complaint.upvote_count += 1
+            upvote_delta += 1
+
+    # Apply the change last so the row lock is only held until commit
+    upvote_count = await increment_counter(session, complaint_id, Complaint.upvote_count, upvote_delta)
 
     await session.commit()
+    await pulse_cache.invalidate("/complaints", "/analytics/map-data")
 
-    return {"message": "Vote recorded", "upvote_count": complaint.upvote_count}
+    return {"message": "Vote recorded", "upvote_count": upvote_count}
 
 
 @router.post("/complaints/{complaint_id}/comments")
@@ -434,19 +883,15 @@ async def add_comment(
 ):
     """Add a comment to a complaint."""
 
-    # Check if complaint exists
-    complaint_result = await session.execute(
-        select(Complaint).where(Complaint.id == complaint_id)
-    )
-    complaint = complaint_result.scalar_one_or_none()
-
-    if not complaint:
-        raise HTTPException(status_code=404, detail="Complaint not found")
-
     content = comment_data.get("content", "").strip()
     if not content:
         raise HTTPException(status_code=400, detail="Comment content is required")
 
+    # Update comment count atomically; no row means the complaint doesn't exist
+    comment_count = await increment_counter(session, complaint_id, Complaint.comment_count)
+    if comment_count is None:
+        raise HTTPException(status_code=404, detail="Complaint not found")
+
     # Create comment
     new_comment = ComplaintComment(
         complaint_id=complaint_id,
@@ -457,10 +902,8 @@ async def add_comment(
 
     session.add(new_comment)
 
-    # Update comment count
-    complaint.comment_count += 1
-
     await session.commit()
+    await pulse_cache.invalidate("/complaints")
 
     return {
         "message": "Comment added successfully",
@@ -578,6 +1021,10 @@ async def generate_sample_data(
 
     await session.commit()
 
+    # Sample complaints are backdated, so bring the daily rollups up to date now
+    await analytics_rollup_job.run_once()
+    await pulse_cache.invalidate()
+
     return {
         "message": f"Generated {count} sample complaints",
         "complaints": created_complaints
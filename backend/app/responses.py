@@ -0,0 +1,37 @@
+import json
+from typing import Any, Optional
+from fastapi.responses import JSONResponse
+
+# Try to import orjson, but make it optional
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+def dumps(content: Any) -> bytes:
+    """Encode JSON with orjson when available, else compact stdlib json."""
+    if HAS_ORJSON:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def sse_event(payload: Any, event_id: Optional[str] = None) -> bytes:
+    """Encode one Server-Sent Events frame with a JSON `data:` line."""
+    frame = b"data: " + dumps(payload) + b"\n\n"
+    if event_id is not None:
+        frame = f"id: {event_id}\n".encode("utf-8") + frame
+    return frame
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response for payloads that are already plain dicts/lists/strings.
+
+    Returning it directly from an endpoint skips FastAPI's jsonable_encoder
+    pass over the payload.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,475 @@
+import os
+import re
+import json
+import time
+import asyncio
+from collections import deque
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from app.metrics import metrics
+
+# Try to import redis, but make it optional
+try:
+    import redis.asyncio as redis
+    HAS_REDIS = True
+except ImportError:
+    HAS_REDIS = False
+
+TASK_TTL_SECONDS = int(os.getenv("TASK_BROKER_TTL_SECONDS", "3600"))
+# Events kept per task so a reconnecting client can resume
+REPLAY_BUFFER_SIZE = int(os.getenv("TASK_REPLAY_BUFFER_SIZE", "2000"))
+# LLM deltas are coalesced into one event per time window or byte threshold
+# (whichever comes first); 0 ms disables coalescing
+COALESCE_SECONDS = float(os.getenv("SSE_COALESCE_MS", "20")) / 1000
+COALESCE_BYTES = int(os.getenv("SSE_COALESCE_BYTES", "512"))
+# Unread events a task may buffer before its overflow policy kicks in:
+# "block" makes the producer wait for the consumer, "drop_coalesce" appends
+# further text to the newest unread event instead of queueing a new one
+QUEUE_MAX_DEPTH = max(1, int(os.getenv("TASK_QUEUE_MAX_DEPTH", "256")))
+QUEUE_POLICY = os.getenv("TASK_QUEUE_POLICY", "block")
+QUEUE_POLICIES = ("block", "drop_coalesce")
+
+stream_deltas = metrics.counter("chat_stream_deltas", "LLM deltas written by chat flows")
+stream_events = metrics.counter("chat_stream_events", "Chat stream events published after coalescing")
+queue_depth = metrics.histogram("chat_queue_depth", "Unread events in a task's queue after each publish")
+producer_wait = metrics.histogram("chat_producer_wait_seconds", "Time a flow waited on a full task queue")
+queue_coalesced = metrics.counter("chat_queue_coalesced", "Publishes merged into an unread event because the queue was full")
+
+
+def default_task_metadata() -> Dict:
+    """Thread metadata for a task the client hasn't described yet."""
+    return {
+        "complaint_topic": "",
+        "complaint_quality": 0,
+        "complaint_summary": "",
+        "complaint_location": ""
+    }
+
+
+class TaskExistsError(Exception):
+    """Raised when creating a task whose ID is already registered."""
+
+
+class TaskBroker:
+    """
+    Carries streamed chat output and thread metadata from the worker running
+    a task's flow to the worker serving its SSE stream.
+
+    A task's messages are delivered in order, each with an event ID that
+    increases monotonically within the task; the stream ends after the
+    producer publishes None. The most recent REPLAY_BUFFER_SIZE events are
+    kept, so a subscriber can resume after the last ID it saw.
+    """
+
+    async def create(self, task_id: str, metadata: Dict, policy: Optional[str] = None):
+        """
+        Register a new task. Raises TaskExistsError if it already exists.
+
+        Args:
+            task_id: New task ID
+            metadata: Initial thread metadata
+            policy: Overflow policy for the task's queue ("block" or
+                "drop_coalesce"); defaults to TASK_QUEUE_POLICY
+        """
+        raise NotImplementedError
+
+    async def ensure(self, task_id: str):
+        """Register a task with default metadata unless it already exists."""
+        raise NotImplementedError
+
+    async def exists(self, task_id: str) -> bool:
+        """Whether the task is registered (and not yet deleted or expired)."""
+        raise NotImplementedError
+
+    async def publish(self, task_id: str, message: Optional[str]):
+        """Append a message to the task's stream; None ends the stream."""
+        raise NotImplementedError
+
+    async def get_metadata(self, task_id: str) -> Dict:
+        raise NotImplementedError
+
+    async def set_metadata(self, task_id: str, metadata: Dict):
+        raise NotImplementedError
+
+    def subscribe(self, task_id: str, after: Optional[str] = None) -> AsyncIterator[Tuple[str, Optional[str]]]:
+        """
+        Yield (event_id, message) pairs until the end of the stream.
+
+        Args:
+            task_id: Task to read
+            after: Last event ID the client received; replay starts after it.
+                None (or an unrecognised ID) replays from the start of the buffer.
+
+        The end of the stream is yielded as (event_id, None). A subscriber
+        resuming after the end event gets it again straight away, so it can
+        finish instead of waiting for events that will never come.
+        """
+        raise NotImplementedError
+
+    async def delete(self, task_id: str):
+        """Forget a task and anything still buffered for it."""
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class _MemoryChannel:
+    """One task's replay buffer and metadata."""
+
+    def __init__(self, metadata: Dict, policy: Optional[str] = None):
+        self.metadata = metadata
+        self.policy = policy or QUEUE_POLICY
+        if self.policy not in QUEUE_POLICIES:
+            raise ValueError(f"Unknown queue policy: {self.policy}")
+        # Unread events must never fall out of the replay buffer
+        self.events = deque(maxlen=max(REPLAY_BUFFER_SIZE, QUEUE_MAX_DEPTH + 1))
+        self.last_id = 0
+        # Newest event handed to a subscriber
+        self.delivered_id = 0
+        self.changed = asyncio.Condition()
+        # Set once the end-of-stream marker is published
+        self.ended = False
+
+    @property
+    def depth(self) -> int:
+        """Events published but not yet picked up by a subscriber."""
+        return self.last_id - self.delivered_id
+
+
+class InMemoryTaskBroker(TaskBroker):
+    """
+    Per-process broker; the POST and the SSE stream must hit the same worker.
+
+    Registration is a single dict get-or-create with no await in between,
+    so concurrent requests can't race and no lock is needed.
+
+    Each task's queue holds at most TASK_QUEUE_MAX_DEPTH unread events; a
+    stalled client then either blocks the producer or has further output
+    merged into the newest unread event, depending on the task's policy.
+    """
+
+    def __init__(self):
+        self._channels: Dict[str, _MemoryChannel] = {}
+
+    async def create(self, task_id: str, metadata: Dict, policy: Optional[str] = None):
+        channel = _MemoryChannel(metadata, policy)
+        if self._channels.setdefault(task_id, channel) is not channel:
+            raise TaskExistsError(f"Task {task_id} already exists")
+
+    async def ensure(self, task_id: str):
+        self._get_or_create(task_id)
+
+    def _get_or_create(self, task_id: str) -> _MemoryChannel:
+        channel = self._channels.get(task_id)
+        if channel is None:
+            channel = self._channels[task_id] = _MemoryChannel(default_task_metadata())
+        return channel
+
+    async def exists(self, task_id: str) -> bool:
+        return task_id in self._channels
+
+    async def publish(self, task_id: str, message: Optional[str]):
+        channel = self._channels.get(task_id)
+        # The stream was already consumed and cleaned up; nobody is listening
+        if channel is None:
+            return
+        async with channel.changed:
+            # Nothing may follow (or be merged into) the end marker
+            if channel.ended:
+                return
+            # The end marker always goes through
+            if message is not None and channel.depth >= QUEUE_MAX_DEPTH:
+                if channel.policy == "drop_coalesce":
+                    event_id, text = channel.events[-1]
+                    channel.events[-1] = (event_id, text + message)
+                    queue_coalesced.inc()
+                    return
+                started = time.perf_counter()
+                await channel.changed.wait_for(lambda: channel.depth < QUEUE_MAX_DEPTH)
+                producer_wait.observe(time.perf_counter() - started)
+            channel.last_id += 1
+            channel.events.append((channel.last_id, message))
+            channel.ended = message is None
+            queue_depth.observe(channel.depth)
+            channel.changed.notify_all()
+
+    async def get_metadata(self, task_id: str) -> Dict:
+        channel = self._channels.get(task_id)
+        return channel.metadata if channel is not None else {}
+
+    async def set_metadata(self, task_id: str, metadata: Dict):
+        channel = self._channels.get(task_id)
+        if channel is not None:
+            channel.metadata = metadata
+
+    async def subscribe(self, task_id: str, after: Optional[str] = None) -> AsyncIterator[Tuple[str, Optional[str]]]:
+        channel = self._get_or_create(task_id)
+        last_seen = int(after) if after and after.isdigit() else 0
+        if channel.ended and last_seen >= channel.last_id:
+            yield str(channel.last_id), None
+            return
+        while True:
+            async with channel.changed:
+                await channel.changed.wait_for(lambda: channel.last_id > last_seen)
+                pending = [event for event in channel.events if event[0] > last_seen]
+                # Claimed events can no longer be merged into, and free up queue space
+                if pending[-1][0] > channel.delivered_id:
+                    channel.delivered_id = pending[-1][0]
+                    channel.changed.notify_all()
+            for event_id, message in pending:
+                last_seen = event_id
+                yield str(event_id), message
+                if message is None:
+                    return
+
+    async def delete(self, task_id: str):
+        self._channels.pop(task_id, None)
+
+
+class RedisTaskBroker(TaskBroker):
+    """
+    Broker shared by all workers through Redis Streams.
+
+    Each task has a stream of messages (XADD/XREAD), a JSON metadata key and
+    a state hash (overflow policy, events published, newest event read).
+    All expire after TASK_BROKER_TTL_SECONDS so abandoned tasks clean up
+    after themselves. Redis stream entry IDs are the event IDs; subscribers
+    read from the start of the stream (or after the given ID), so output
+    produced before the client (re)connected is not lost.
+
+    The overflow policy works as in memory: with TASK_QUEUE_MAX_DEPTH
+    unread events, "block" polls until the consumer catches up and
+    "drop_coalesce" holds further text on the producer and sends it as one
+    event once there is room (or with the end of the stream). The stream is
+    never trimmed below the unread events.
+    """
+
+    BLOCK_MS = 5000
+    POLL_SECONDS = 0.05
+    STREAM_ID = re.compile(r"^\d+-\d+$")
+
+    def __init__(self, url: str, prefix: str = "chat_task"):
+        self.client = redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        # drop_coalesce text waiting for queue space, per task (producer side)
+        self._held: Dict[str, str] = {}
+
+    def _stream_key(self, task_id: str) -> str:
+        return f"{self.prefix}:{task_id}:stream"
+
+    def _metadata_key(self, task_id: str) -> str:
+        return f"{self.prefix}:{task_id}:metadata"
+
+    def _state_key(self, task_id: str) -> str:
+        return f"{self.prefix}:{task_id}:state"
+
+    async def create(self, task_id: str, metadata: Dict, policy: Optional[str] = None):
+        policy = policy or QUEUE_POLICY
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"Unknown queue policy: {policy}")
+        created = await self.client.set(
+            self._metadata_key(task_id), json.dumps(metadata), nx=True, ex=TASK_TTL_SECONDS
+        )
+        if not created:
+            raise TaskExistsError(f"Task {task_id} already exists")
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(self._state_key(task_id), mapping={"policy": policy, "published": 0, "delivered": 0})
+            pipe.expire(self._state_key(task_id), TASK_TTL_SECONDS)
+            await pipe.execute()
+
+    async def ensure(self, task_id: str):
+        await self.client.set(
+            self._metadata_key(task_id), json.dumps(default_task_metadata()), nx=True, ex=TASK_TTL_SECONDS
+        )
+
+    async def exists(self, task_id: str) -> bool:
+        return bool(await self.client.exists(self._metadata_key(task_id)))
+
+    async def _state(self, task_id: str) -> Tuple[str, int, int, bool]:
+        """(policy, published, delivered, ended) for a task."""
+        policy, published, delivered, ended = await self.client.hmget(
+            self._state_key(task_id), "policy", "published", "delivered", "ended"
+        )
+        return policy or QUEUE_POLICY, int(published or 0), int(delivered or 0), bool(ended)
+
+    async def publish(self, task_id: str, message: Optional[str]):
+        policy, published, delivered, ended = await self._state(task_id)
+        # Nothing may follow the end marker
+        if ended:
+            return
+
+        if message is not None and published - delivered >= QUEUE_MAX_DEPTH:
+            if policy == "drop_coalesce":
+                self._held[task_id] = self._held.get(task_id, "") + message
+                queue_coalesced.inc()
+                return
+            started = time.perf_counter()
+            while published - delivered >= QUEUE_MAX_DEPTH:
+                if not await self.exists(task_id):
+                    # Consumer gone and task cleaned up; nobody will read this
+                    return
+                await asyncio.sleep(self.POLL_SECONDS)
+                _, published, delivered, _ = await self._state(task_id)
+            producer_wait.observe(time.perf_counter() - started)
+
+        # Held text goes out first, as one event, once there is room
+        held = self._held.pop(task_id, None)
+        if held is not None:
+            if message is not None:
+                message = held + message
+            else:
+                await self._append(task_id, held, published + 1)
+                published += 1
+
+        if message is None:
+            await self._append(task_id, None, published)
+        else:
+            await self._append(task_id, message, published + 1)
+            queue_depth.observe(published + 1 - delivered)
+
+    async def _append(self, task_id: str, message: Optional[str], seq: int):
+        """XADD one event; `seq` numbers content events so consumer lag can be measured."""
+        if message is None:
+            fields = {"end": "1"}
+        else:
+            fields = {"data": message, "seq": seq}
+        async with self.client.pipeline(transaction=False) as pipe:
+            # Approximate trimming never goes below maxlen, which covers every unread event
+            pipe.xadd(self._stream_key(task_id), fields, maxlen=max(REPLAY_BUFFER_SIZE, QUEUE_MAX_DEPTH + 1), approximate=True)
+            if message is None:
+                pipe.hset(self._state_key(task_id), "ended", 1)
+            else:
+                pipe.hset(self._state_key(task_id), "published", seq)
+            pipe.expire(self._stream_key(task_id), TASK_TTL_SECONDS)
+            pipe.expire(self._state_key(task_id), TASK_TTL_SECONDS)
+            await pipe.execute()
+
+    async def get_metadata(self, task_id: str) -> Dict:
+        value = await self.client.get(self._metadata_key(task_id))
+        return json.loads(value) if value is not None else {}
+
+    async def set_metadata(self, task_id: str, metadata: Dict):
+        # xx: don't resurrect a task whose consumer already cleaned it up
+        await self.client.set(self._metadata_key(task_id), json.dumps(metadata), xx=True, ex=TASK_TTL_SECONDS)
+
+    async def subscribe(self, task_id: str, after: Optional[str] = None) -> AsyncIterator[Tuple[str, Optional[str]]]:
+        key = self._stream_key(task_id)
+        last_id = after if after and self.STREAM_ID.match(after) else "0"
+        if last_id != "0":
+            # Resuming after the end event: nothing follows it
+            resumed = await self.client.xrange(key, min=last_id, max=last_id)
+            if resumed and "end" in resumed[0][1]:
+                yield last_id, None
+                return
+        delivered = 0
+        while True:
+            response = await self.client.xread({key: last_id}, block=self.BLOCK_MS, count=100)
+            entries = [entry for _, stream_entries in response or [] for entry in stream_entries]
+            # Claimed events free up queue space for a blocked or coalescing producer
+            newest = max((int(fields.get("seq", 0)) for _, fields in entries), default=0)
+            if newest > delivered:
+                delivered = newest
+                async with self.client.pipeline(transaction=False) as pipe:
+                    pipe.hset(self._state_key(task_id), "delivered", delivered)
+                    pipe.expire(self._state_key(task_id), TASK_TTL_SECONDS)
+                    await pipe.execute()
+            for entry_id, fields in entries:
+                last_id = entry_id
+                if "end" in fields:
+                    yield entry_id, None
+                    return
+                yield entry_id, fields.get("data", "")
+
+    async def delete(self, task_id: str):
+        self._held.pop(task_id, None)
+        await self.client.delete(self._stream_key(task_id), self._metadata_key(task_id), self._state_key(task_id))
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class TaskQueue:
+    """
+    Queue-like handle the flow nodes write to (`shared["message_queue"]`).
+
+    Deltas are coalesced before they reach the broker: buffered text is
+    published as one event once it reaches `coalesce_bytes`, or
+    `coalesce_seconds` after the first buffered delta, so a 1-3 character
+    token stream turns into a few events per second instead of dozens.
+
+    `metadata` is the dict the nodes update in place; it is written to the
+    broker just before the end-of-stream marker, so whichever worker serves
+    the stream sees the final values.
+    """
+
+    def __init__(self, broker: TaskBroker, task_id: str, metadata: Dict,
+                 coalesce_seconds: float = COALESCE_SECONDS, coalesce_bytes: int = COALESCE_BYTES):
+        self.broker = broker
+        self.task_id = task_id
+        self.metadata = metadata
+        self.coalesce_seconds = coalesce_seconds
+        self.coalesce_bytes = coalesce_bytes
+        self._buffer: List[str] = []
+        self._buffered_bytes = 0
+        self._buffer_started = 0.0
+        self._flush_lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+
+    async def put(self, message: Optional[str]):
+        if message is None:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            await self.flush()
+            await self.broker.set_metadata(self.task_id, self.metadata)
+            await self.broker.publish(self.task_id, None)
+            return
+
+        stream_deltas.inc()
+        if self.coalesce_seconds <= 0:
+            stream_events.inc()
+            await self.broker.publish(self.task_id, message)
+            return
+
+        if not self._buffer:
+            self._buffer_started = time.monotonic()
+        self._buffer.append(message)
+        self._buffered_bytes += len(message.encode("utf-8"))
+
+        if (self._buffered_bytes >= self.coalesce_bytes
+                or time.monotonic() - self._buffer_started >= self.coalesce_seconds):
+            await self.flush()
+        elif self._timer is None:
+            # Make sure a lone delta goes out even if the LLM pauses
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.coalesce_seconds)
+        self._timer = None
+        # Once started, a flush must finish even if the stream is ended meanwhile
+        await asyncio.shield(self.flush())
+
+    async def flush(self):
+        """Publish whatever text is buffered as one event."""
+        async with self._flush_lock:
+            if not self._buffer:
+                return
+            text = "".join(self._buffer)
+            self._buffer = []
+            self._buffered_bytes = 0
+            stream_events.inc()
+            await self.broker.publish(self.task_id, text)
+
+
+def create_task_broker() -> TaskBroker:
+    """Pick the task broker from TASK_BROKER ("memory" or "redis")."""
+    backend = os.getenv("TASK_BROKER", "memory").lower()
+    if backend == "redis":
+        if HAS_REDIS:
+            return RedisTaskBroker(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+        print("Warning: redis not available. Falling back to in-memory task broker.")
+    return InMemoryTaskBroker()
+
+
+task_broker = create_task_broker()
@@ -0,0 +1,202 @@
+import os
+import time
+import asyncio
+from typing import Awaitable, Dict, Optional
+
+from app.metrics import metrics
+from app.task_broker import TaskBroker, TaskQueue, task_broker
+
+tasks_live = metrics.gauge("chat_tasks_live", "Chat tasks tracked by this worker")
+tasks_orphaned = metrics.gauge("chat_tasks_orphaned", "Tracked chat tasks with no stream consumer attached")
+tasks_reaped = metrics.counter("chat_tasks_reaped", "Chat tasks dropped after their TTL without a consumer")
+flows_cancelled = metrics.counter("chat_flows_cancelled", "Chat flows cancelled before finishing (consumer gone or task reaped)")
+
+
+class TrackedTask:
+    """Lifecycle of one chat task on this worker."""
+
+    def __init__(self, task_id: str):
+        self.task_id = task_id
+        self.created_at = time.monotonic()
+        # created -> running -> finished / failed / cancelled
+        self.state = "created"
+        # Open streams; a reconnect can overlap the old connection briefly
+        self.consumers = 0
+        # When the last consumer left before the end of the stream
+        self.detached_at: Optional[float] = None
+        self.flow: Optional[asyncio.Task] = None
+        # TaskQueue the flow writes to; a failed flow ends the stream through it
+        self.queue: Optional[TaskQueue] = None
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.created_at
+
+
+class TaskManager:
+    """
+    Tracks chat tasks from POST /api/chat until their stream is consumed.
+
+    The flow runs as its own asyncio task so it can be cancelled once the
+    stream consumer is gone. A consumer that disconnects mid-stream has
+    `resume_grace_seconds` to reconnect (with Last-Event-ID) before the flow
+    is cancelled and the task dropped. If the consumer is on another worker,
+    its cleanup deletes the task from the broker; the reaper notices and
+    cancels the flow here. Tasks nobody attaches to within `ttl_seconds` are
+    reaped together with their broker state.
+    """
+
+    def __init__(self, broker: TaskBroker, ttl_seconds: float, reap_interval: float, resume_grace_seconds: float):
+        self.broker = broker
+        self.ttl_seconds = ttl_seconds
+        self.reap_interval = reap_interval
+        self.resume_grace_seconds = resume_grace_seconds
+        self._tasks: Dict[str, TrackedTask] = {}
+        self._reaper: Optional[asyncio.Task] = None
+
+    def _update_gauges(self):
+        tasks_live.set(len(self._tasks))
+        tasks_orphaned.set(sum(1 for task in self._tasks.values() if not task.consumers))
+
+    def register(self, task_id: str) -> TrackedTask:
+        """Start tracking a task (or return the existing entry)."""
+        task = self._tasks.get(task_id)
+        if task is None:
+            task = self._tasks[task_id] = TrackedTask(task_id)
+            self._update_gauges()
+        return task
+
+    def start_flow(self, task_id: str, flow: Awaitable, queue: Optional[TaskQueue] = None):
+        """
+        Run the task's flow in the background.
+
+        Args:
+            task_id: Task the flow belongs to
+            flow: Coroutine running the flow
+            queue: The TaskQueue the flow writes to
+        """
+        task = self.register(task_id)
+        task.state = "running"
+        task.queue = queue
+        task.flow = asyncio.create_task(self._run_flow(task, flow))
+
+    async def _run_flow(self, task: TrackedTask, flow: Awaitable):
+        try:
+            await flow
+            task.state = "finished"
+        except asyncio.CancelledError:
+            task.state = "cancelled"
+            raise
+        except Exception as e:
+            task.state = "failed"
+            print(f"❌ Flow for task {task.task_id} failed: {e}")
+            # End the stream so the consumer isn't left waiting. Going through the
+            # queue flushes buffered text first and stops its flush timer.
+            if task.queue is not None:
+                await task.queue.put(None)
+            else:
+                await self.broker.publish(task.task_id, None)
+
+    def attach(self, task_id: str):
+        """Record that a stream consumer is reading (or resuming) the task."""
+        task = self.register(task_id)
+        task.consumers += 1
+        task.detached_at = None
+        self._update_gauges()
+
+    async def detach(self, task_id: str, completed: bool, resumable: bool = True):
+        """
+        A stream consumer went away.
+
+        Args:
+            task_id: Task being streamed
+            completed: Whether the consumer read the stream to the end. If
+                so the task is dropped; if not it is kept for the resume
+                grace period so the client can reconnect.
+            resumable: False for transports that can't resume (WebSocket);
+                an unfinished flow is then cancelled straight away
+        """
+        task = self._tasks.get(task_id)
+        if completed or task is None:
+            self._tasks.pop(task_id, None)
+            await self.broker.delete(task_id)
+        elif not resumable:
+            self._tasks.pop(task_id, None)
+            self._cancel_flow(task)
+            await self.broker.delete(task_id)
+        else:
+            task.consumers = max(0, task.consumers - 1)
+            if not task.consumers:
+                task.detached_at = time.monotonic()
+        self._update_gauges()
+
+    def _cancel_flow(self, task: TrackedTask):
+        if task.flow is not None and not task.flow.done():
+            print(f"🛑 Cancelling flow for task {task.task_id}")
+            task.flow.cancel()
+            flows_cancelled.inc()
+
+    async def reap_once(self) -> int:
+        """
+        Drop tasks without a local consumer that were consumed elsewhere,
+        were not resumed within the grace period, or have outlived the TTL.
+
+        Returns:
+            int: Number of tasks reaped after their TTL
+        """
+        reaped = 0
+        for task in list(self._tasks.values()):
+            if task.consumers:
+                continue
+            if not await self.broker.exists(task.task_id):
+                # Consumed (or abandoned) through another worker
+                self._tasks.pop(task.task_id, None)
+                self._cancel_flow(task)
+            elif task.detached_at is not None and time.monotonic() - task.detached_at > self.resume_grace_seconds:
+                print(f"🧹 Dropping task {task.task_id}; client did not resume")
+                self._tasks.pop(task.task_id, None)
+                self._cancel_flow(task)
+                await self.broker.delete(task.task_id)
+            elif task.age > self.ttl_seconds:
+                print(f"🧹 Reaping orphaned task {task.task_id} ({task.state})")
+                self._tasks.pop(task.task_id, None)
+                self._cancel_flow(task)
+                await self.broker.delete(task.task_id)
+                tasks_reaped.inc()
+                reaped += 1
+        self._update_gauges()
+        return reaped
+
+    async def _run_loop(self):
+        while True:
+            await asyncio.sleep(self.reap_interval)
+            try:
+                await self.reap_once()
+            except Exception as e:
+                print(f"Warning: Task reaping failed: {e}")
+
+    async def start(self):
+        """Start the reaper (called at application startup)."""
+        if self._reaper is None:
+            self._reaper = asyncio.create_task(self._run_loop())
+
+    async def stop(self):
+        """Stop the reaper and cancel running flows (called at application shutdown)."""
+        if self._reaper is not None:
+            self._reaper.cancel()
+            try:
+                await self._reaper
+            except asyncio.CancelledError:
+                pass
+            self._reaper = None
+        for task in self._tasks.values():
+            if task.flow is not None and not task.flow.done():
+                task.flow.cancel()
+
+
+task_manager = TaskManager(
+    task_broker,
+    ttl_seconds=float(os.getenv("TASK_ORPHAN_TTL_SECONDS", "300")),
+    reap_interval=float(os.getenv("TASK_REAP_INTERVAL_SECONDS", "30")),
+    resume_grace_seconds=float(os.getenv("TASK_RESUME_GRACE_SECONDS", "60")),
+)
@@ -0,0 +1,265 @@
+import os
+import math
+import asyncio
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import engine, HAS_VECTOR
+
+INDEX_NAME = "idx_complaints_embedding_cosine"
+# "hnsw" (good recall without tuning, builds incrementally) or "ivfflat"
+# (smaller and faster to build, but needs data before its lists are useful)
+VECTOR_INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE", "hnsw").lower()
+# Recall the similarity search aims for (0-1); maps to ef_search / probes
+VECTOR_RECALL_TARGET = float(os.getenv("VECTOR_RECALL_TARGET", "0.95"))
+# Below this many embedded rows an exact scan is fast enough, so IVFFlat isn't built
+IVFFLAT_MIN_ROWS = int(os.getenv("IVFFLAT_MIN_ROWS", "10000"))
+# Fewer lists than this make IVFFlat little more than a slower exact scan
+IVFFLAT_MIN_LISTS = 10
+VECTOR_INDEX_CHECK_SECONDS = float(os.getenv("VECTOR_INDEX_CHECK_SECONDS", "3600"))
+
+# Advisory lock so only one worker builds the index at a time
+INDEX_LOCK_KEY = 720231
+HNSW_M = 16
+HNSW_EF_CONSTRUCTION = 64
+
+# Recall target -> hnsw.ef_search (pgvector default is 40)
+HNSW_EF_SEARCH = [(0.90, 40), (0.95, 80), (0.98, 160), (0.99, 320)]
+# Upper bound pgvector accepts for hnsw.ef_search
+HNSW_MAX_EF_SEARCH = 1000
+# Recall target -> share of IVFFlat lists probed
+IVFFLAT_PROBE_FRACTION = [(0.90, 0.02), (0.95, 0.05), (0.98, 0.10), (0.99, 0.20)]
+
+
+def _for_recall(table, recall_target: float):
+    """Smallest setting in `table` whose recall is at least the target."""
+    for recall, value in table:
+        if recall_target <= recall:
+            return value
+    return table[-1][1]
+
+
+def ivfflat_lists(rows: int) -> int:
+    """pgvector's rule of thumb: rows / 1000 up to 1M rows, sqrt(rows) beyond (at least IVFFLAT_MIN_LISTS)."""
+    if rows <= 1_000_000:
+        return max(IVFFLAT_MIN_LISTS, rows // 1000)
+    return int(math.sqrt(rows))
+
+
+def hnsw_ef_search(recall_target: float) -> int:
+    return _for_recall(HNSW_EF_SEARCH, recall_target)
+
+
+def ivfflat_probes(lists: int, recall_target: float) -> int:
+    return max(1, math.ceil(lists * _for_recall(IVFFLAT_PROBE_FRACTION, recall_target)))
+
+
+def pgvector_version(version: str) -> tuple:
+    """'0.8.0' -> (0, 8, 0)"""
+    return tuple(int(part) for part in version.split(".") if part.isdigit())
+
+
+class VectorIndexManager:
+    """
+    Owns the ANN index on complaints.embedding.
+
+    HNSW is created once and maintained by Postgres. IVFFlat is only built
+    once IVFFLAT_MIN_ROWS rows have embeddings (k-means on an empty table
+    gives useless lists) and is rebuilt with more lists each time the row
+    count has doubled. Rebuilds use CREATE INDEX CONCURRENTLY, so writes
+    carry on meanwhile.
+    """
+
+    def __init__(self, index_type: str, recall_target: float, check_interval: float):
+        if index_type not in ("hnsw", "ivfflat"):
+            raise ValueError(f"Unknown vector index type: {index_type}")
+        self.index_type = index_type
+        self.recall_target = recall_target
+        self.check_interval = check_interval
+        # Lists of the current IVFFlat index (None if there is none)
+        self.lists: Optional[int] = None
+        # Whether pgvector supports iterative index scans (0.8+), for filtered search
+        self.iterative_scan = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def _current_index(self, conn):
+        """
+        Describe the existing index.
+
+        Returns:
+            (type, lists): type is "hnsw", "ivfflat", "invalid" (a failed
+            concurrent build) or None; lists is set for IVFFlat only
+        """
+        result = await conn.execute(text("""
+            SELECT am.amname, c.reloptions, i.indisvalid
+            FROM pg_class c
+            JOIN pg_am am ON am.oid = c.relam
+            JOIN pg_index i ON i.indexrelid = c.oid
+            WHERE c.relname = :name
+        """), {"name": INDEX_NAME})
+        row = result.first()
+        if row is None:
+            return None, None
+        if not row[2]:
+            return "invalid", None
+        if row[0] == "ivfflat":
+            options = dict(option.split("=", 1) for option in (row[1] or []))
+            return "ivfflat", int(options.get("lists", 100))
+        return row[0], None
+
+    def _create_sql(self, name: str, lists: Optional[int] = None) -> str:
+        if self.index_type == "hnsw":
+            return (
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON complaints "
+                f"USING hnsw (embedding vector_cosine_ops) WITH (m = {HNSW_M}, ef_construction = {HNSW_EF_CONSTRUCTION})"
+            )
+        return (
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON complaints "
+            f"USING ivfflat (embedding vector_cosine_ops) WITH (lists = {lists})"
+        )
+
+    async def _build(self, conn, lists: Optional[int] = None, replace: bool = False):
+        """
+        Build the index; when replacing, swap it in only once the new one is ready.
+
+        The old index is renamed aside and the new one renamed into place in
+        one transaction, and only then is the old one dropped, so similarity
+        queries always have an index to use.
+        """
+        if not replace:
+            await conn.execute(text(self._create_sql(INDEX_NAME, lists)))
+            return
+        staging = f"{INDEX_NAME}_new"
+        retired = f"{INDEX_NAME}_old"
+        await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {staging}"))
+        await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {retired}"))
+        await conn.execute(text(self._create_sql(staging, lists)))
+        # `conn` is in autocommit mode, so swap the names in a transaction of its own
+        async with engine.begin() as swap:
+            await swap.execute(text(f"ALTER INDEX {INDEX_NAME} RENAME TO {retired}"))
+            await swap.execute(text(f"ALTER INDEX {staging} RENAME TO {INDEX_NAME}"))
+        await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {retired}"))
+
+    async def ensure_index(self):
+        """Create, convert or rebuild the index as needed."""
+        if not HAS_VECTOR:
+            return
+        # CREATE/DROP INDEX CONCURRENTLY can't run inside a transaction
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            current_type, current_lists = await self._current_index(conn)
+            self.lists = current_lists
+            version = (await conn.execute(text("SELECT extversion FROM pg_extension WHERE extname = 'vector'"))).scalar()
+            self.iterative_scan = version is not None and pgvector_version(version) >= (0, 8)
+
+            locked = (await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": INDEX_LOCK_KEY})).scalar()
+            if not locked:
+                # Another worker is maintaining the index
+                return
+            try:
+                self.lists = await self._maintain(conn, current_type, current_lists)
+            finally:
+                await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": INDEX_LOCK_KEY})
+
+    async def _maintain(self, conn, current_type: Optional[str], current_lists: Optional[int]) -> Optional[int]:
+        """Bring the index in line with the configured type; returns its IVFFlat lists."""
+        if self.index_type == "hnsw":
+            if current_type != "hnsw":
+                print(f"Building HNSW index on complaint embeddings{' (replacing ' + current_type + ')' if current_type else ''}...")
+                await self._build(conn, replace=current_type is not None)
+                print("✅ HNSW index ready")
+            return None
+
+        rows = (await conn.execute(text("SELECT count(*) FROM complaints WHERE embedding IS NOT NULL"))).scalar()
+        if rows < IVFFLAT_MIN_ROWS:
+            # Exact search is accurate and fast at this size; an IVFFlat index would only hurt
+            if current_type is not None:
+                await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {INDEX_NAME}"))
+            return None
+
+        target_lists = ivfflat_lists(rows)
+        if current_type != "ivfflat" or target_lists >= 2 * current_lists:
+            print(f"Building IVFFlat index with {target_lists} lists for {rows} embedded complaints...")
+            await self._build(conn, lists=target_lists, replace=current_type is not None)
+            print("✅ IVFFlat index ready")
+            return target_lists
+        return current_lists
+
+    def filters_in_scan(self) -> bool:
+        """
+        Whether a filtered query can keep its WHERE clause in the index scan.
+
+        A plain index scan returns ef_search (or probes' worth of) candidates
+        and only then applies the WHERE clause, so a filtered query can come
+        back with fewer rows than its LIMIT. That is safe with pgvector 0.8+
+        iterative scans, or when there is no ANN index; otherwise callers
+        have to over-fetch and filter afterwards.
+        """
+        if self.index_type == "ivfflat" and not self.lists:
+            return True
+        return self.iterative_scan
+
+    async def apply_search_settings(
+        self,
+        session: AsyncSession,
+        recall_target: Optional[float] = None,
+        filtered: bool = False,
+        limit: Optional[int] = None,
+        max_scan_tuples: Optional[int] = None,
+    ):
+        """
+        Tune the index scan for the current transaction (SET LOCAL).
+
+        Args:
+            session: Session that will run the similarity query
+            recall_target: Desired recall, 0-1; defaults to VECTOR_RECALL_TARGET
+            filtered: The query has a WHERE clause besides the embedding; turns
+                on iterative scanning where supported
+            limit: Rows the query fetches from the index; an HNSW scan
+                returns at most ef_search rows, so it is raised to match
+            max_scan_tuples: Cap on tuples an iterative HNSW scan visits
+                (pgvector's default is 20000)
+        """
+        recall_target = recall_target or self.recall_target
+        if self.index_type == "hnsw":
+            ef_search = min(HNSW_MAX_EF_SEARCH, max(hnsw_ef_search(recall_target), limit or 0))
+            await session.execute(text(f"SET LOCAL hnsw.ef_search = {ef_search}"))
+            if filtered and self.iterative_scan:
+                await session.execute(text("SET LOCAL hnsw.iterative_scan = relaxed_order"))
+                if max_scan_tuples:
+                    await session.execute(text(f"SET LOCAL hnsw.max_scan_tuples = {int(max_scan_tuples)}"))
+        elif self.lists:
+            await session.execute(text(f"SET LOCAL ivfflat.probes = {ivfflat_probes(self.lists, recall_target)}"))
+            if filtered and self.iterative_scan:
+                await session.execute(text("SET LOCAL ivfflat.iterative_scan = relaxed_order"))
+
+    async def _run_loop(self):
+        while True:
+            try:
+                await self.ensure_index()
+            except Exception as e:
+                print(f"Warning: Could not maintain vector index: {e}")
+            await asyncio.sleep(self.check_interval)
+
+    async def start(self):
+        """Start index maintenance (called at application startup)."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_loop())
+
+    async def stop(self):
+        """Stop index maintenance (called at application shutdown)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+vector_index = VectorIndexManager(
+    index_type=VECTOR_INDEX_TYPE,
+    recall_target=VECTOR_RECALL_TARGET,
+    check_interval=VECTOR_INDEX_CHECK_SECONDS,
+)
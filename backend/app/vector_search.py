@@ -0,0 +1,208 @@
+import os
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import text, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import Vector
+from app.vector_index import vector_index
+from app.metrics import metrics
+
+# A filtered set this small is searched exactly instead of through the ANN index
+EXACT_SEARCH_MAX_ROWS = int(os.getenv("VECTOR_EXACT_SEARCH_MAX_ROWS", "2000"))
+# Without iterative scans, fetch this many times the limit from the index and filter afterwards
+ANN_OVERFETCH = int(os.getenv("VECTOR_ANN_OVERFETCH", "10"))
+# A filtered ANN search that comes up short is retried once with a scan this many times wider
+ANN_RETRY_WIDEN = int(os.getenv("VECTOR_ANN_RETRY_WIDEN", "5"))
+# hnsw.max_scan_tuples for that retry (pgvector's default is 20000)
+ANN_RETRY_MAX_SCAN_TUPLES = int(os.getenv("VECTOR_ANN_RETRY_MAX_SCAN_TUPLES", "100000"))
+
+exact_searches = metrics.counter("vector_search_exact", "Filtered similarity searches answered by an exact scan")
+ann_searches = metrics.counter("vector_search_ann", "Similarity searches answered from the ANN index")
+ann_retries = metrics.counter("vector_search_ann_retry", "Filtered ANN searches that found too few matches and were retried with a wider scan")
+
+RESULT_COLUMNS = "id, title, category, urgency, status, planning_area, created_at"
+
+
+def build_filters(
+    category: Optional[str] = None,
+    planning_area: Optional[str] = None,
+    status: Optional[str] = None,
+    days: Optional[int] = None,
+) -> Tuple[List[str], Dict[str, Any]]:
+    """SQL conditions and parameters for the similarity-search filters."""
+    clauses, params = [], {}
+    if category:
+        clauses.append("category = :category")
+        params["category"] = category
+    if planning_area:
+        clauses.append("planning_area = :planning_area")
+        params["planning_area"] = planning_area
+    if status:
+        clauses.append("status = :status")
+        params["status"] = status
+    if days:
+        clauses.append("created_at >= now() - make_interval(days => :days)")
+        params["days"] = days
+    return clauses, params
+
+
+def _statement(sql: str):
+    return text(sql).bindparams(bindparam("target_embedding", type_=Vector(1536)))
+
+
+def row_to_dict(row) -> Dict[str, Any]:
+    return {
+        "id": str(row.id),
+        "title": row.title,
+        "category": row.category,
+        "urgency": row.urgency,
+        "status": row.status,
+        "planning_area": row.planning_area,
+        "created_at": row.created_at.isoformat(),
+        "similarity": round(1 - float(row.distance), 3),
+    }
+
+
+async def count_candidates(session: AsyncSession, where: str, params: Dict[str, Any], cap: int) -> int:
+    """Rows matching `where`, counted only up to `cap` so broad filters stay cheap."""
+    result = await session.execute(
+        text(f"SELECT count(*) FROM (SELECT 1 FROM complaints WHERE {where} LIMIT :cap) AS candidates"),
+        {**params, "cap": cap}
+    )
+    return result.scalar()
+
+
+async def exact_search(session: AsyncSession, where: str, params: Dict[str, Any], limit: int):
+    """Exact top-k among the filtered rows (MATERIALIZED keeps the ANN index out of it)."""
+    result = await session.execute(
+        _statement(f"""
+        WITH candidates AS MATERIALIZED (
+            SELECT {RESULT_COLUMNS}, embedding FROM complaints WHERE {where}
+        )
+        SELECT {RESULT_COLUMNS}, embedding <=> :target_embedding AS distance
+        FROM candidates
+        ORDER BY distance
+        LIMIT :limit
+        """),
+        {**params, "limit": limit}
+    )
+    return result.all()
+
+
+async def ann_search(
+    session: AsyncSession,
+    where: str,
+    filter_where: Optional[str],
+    params: Dict[str, Any],
+    limit: int,
+    overfetch_factor: int = ANN_OVERFETCH,
+    max_scan_tuples: Optional[int] = None,
+):
+    """Top-k from the ANN index, keeping recall when filters are applied."""
+    filtered = filter_where is not None
+    overfetch = filtered and not vector_index.filters_in_scan()
+    await vector_index.apply_search_settings(
+        session,
+        filtered=filtered,
+        limit=limit * overfetch_factor if overfetch else limit,
+        max_scan_tuples=max_scan_tuples,
+    )
+
+    if not overfetch:
+        # relaxed_order can return rows slightly out of order, so sort the final page again
+        result = await session.execute(
+            _statement(f"""
+            WITH nearest AS MATERIALIZED (
+                SELECT {RESULT_COLUMNS}, embedding <=> :target_embedding AS distance
+                FROM complaints
+                WHERE {where}
+                ORDER BY distance
+                LIMIT :limit
+            )
+            SELECT * FROM nearest ORDER BY distance
+            """),
+            {**params, "limit": limit}
+        )
+        return result.all()
+
+    # Older pgvector: take more neighbours than needed, then filter
+    result = await session.execute(
+        _statement(f"""
+        SELECT * FROM (
+            SELECT {RESULT_COLUMNS}, embedding <=> :target_embedding AS distance
+            FROM complaints
+            WHERE embedding IS NOT NULL
+            ORDER BY distance
+            LIMIT :fetch
+        ) AS nearest
+        WHERE {filter_where}
+        ORDER BY distance
+        LIMIT :limit
+        """),
+        {**params, "limit": limit, "fetch": limit * overfetch_factor}
+    )
+    return result.all()
+
+
+async def similarity_search(
+    session: AsyncSession,
+    embedding,
+    limit: int,
+    category: Optional[str] = None,
+    planning_area: Optional[str] = None,
+    status: Optional[str] = None,
+    days: Optional[int] = None,
+    exclude_id: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], str]:
+    """
+    Complaints closest to `embedding`, optionally filtered.
+
+    Selective filters (at most EXACT_SEARCH_MAX_ROWS matching rows) are
+    searched exactly over the filtered rows, which is both fast and
+    complete. Broad filters go through the ANN index with an iterative
+    scan (pgvector 0.8+) or over-fetching; if that still finds fewer than
+    `limit` matches, it is retried once with a wider scan, and may then
+    return fewer than `limit` results.
+
+    Args:
+        session: Database session
+        embedding: Query embedding
+        limit: Number of results
+        category, planning_area, status: Exact-match filters
+        days: Only complaints created in the last `days` days
+        exclude_id: Complaint to leave out (the one being compared against)
+
+    Returns:
+        (results, strategy): result dicts ordered by similarity, and
+        "exact" or "ann"
+    """
+    clauses, params = build_filters(category, planning_area, status, days)
+    params["target_embedding"] = embedding
+    filtered = bool(clauses)
+    if exclude_id:
+        clauses.append("id != CAST(:exclude_id AS uuid)")
+        params["exclude_id"] = str(exclude_id)
+    # Leaving out one row doesn't need the filtered-search handling
+    filter_where = " AND ".join(clauses) if filtered else None
+    where = " AND ".join(["embedding IS NOT NULL"] + clauses)
+
+    if filter_where is not None:
+        candidates = await count_candidates(session, where, params, EXACT_SEARCH_MAX_ROWS + 1)
+        if candidates <= EXACT_SEARCH_MAX_ROWS:
+            exact_searches.inc()
+            return [row_to_dict(row) for row in await exact_search(session, where, params, limit)], "exact"
+
+    rows = await ann_search(session, where, filter_where, params, limit)
+    if filter_where is not None and len(rows) < limit:
+        # The index scan gave up before finding enough matches. Retry once with a
+        # wider (but still bounded) scan; an exact search here could mean scoring
+        # most of the table, so a short page is returned rather than that.
+        ann_retries.inc()
+        rows = await ann_search(
+            session, where, filter_where, params, limit,
+            overfetch_factor=ANN_OVERFETCH * ANN_RETRY_WIDEN,
+            max_scan_tuples=ANN_RETRY_MAX_SCAN_TUPLES,
+        )
+
+    ann_searches.inc()
+    return [row_to_dict(row) for row in rows], "ann"
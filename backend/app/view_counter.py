@@ -0,0 +1,130 @@
+import os
+import asyncio
+import uuid
+from collections import defaultdict
+from typing import Dict, Optional
+from sqlalchemy import text
+
+from app.db import async_session_maker
+from app.metrics import metrics
+
+view_flushes = metrics.counter("view_count_flushes", "Batched view-count UPDATEs written")
+views_buffered = metrics.gauge("view_count_pending", "Complaint views waiting to be flushed")
+
+
+class ViewCountBuffer:
+    """
+    Collects complaint view increments in memory and writes them in batches.
+
+    Pending views are flushed with one UPDATE ... FROM (VALUES ...) every
+    `flush_interval` seconds, as soon as `max_pending` views have piled up,
+    and once more at shutdown. Views are counted, not exact: anything still
+    buffered when the process dies is lost.
+    """
+
+    def __init__(self, flush_interval: float, max_pending: int):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: Dict[uuid.UUID, int] = defaultdict(int)
+        self._pending_total = 0
+        self._flush_now = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, complaint_id):
+        """Count one view of a complaint."""
+        self._pending[uuid.UUID(str(complaint_id))] += 1
+        self._pending_total += 1
+        views_buffered.set(self._pending_total)
+        if self._pending_total >= self.max_pending:
+            self._flush_now.set()
+
+    def pending(self, complaint_id) -> int:
+        """Views recorded for a complaint but not yet written."""
+        return self._pending.get(uuid.UUID(str(complaint_id)), 0)
+
+    async def flush(self) -> int:
+        """
+        Write all pending views in one statement.
+
+        Returns:
+            int: Number of complaints updated
+        """
+        if not self._pending:
+            return 0
+
+        batch, self._pending = self._pending, defaultdict(int)
+        self._pending_total = 0
+        views_buffered.set(0)
+
+        values = ", ".join(f"(CAST(:id_{i} AS uuid), CAST(:delta_{i} AS integer))" for i in range(len(batch)))
+        params = {}
+        for i, (complaint_id, delta) in enumerate(sorted(batch.items())):
+            params[f"id_{i}"] = str(complaint_id)
+            params[f"delta_{i}"] = delta
+
+        try:
+            async with async_session_maker() as session:
+                # Lock the rows in id order first; the UPDATE's join order is up to the
+                # planner, so without this two workers flushing overlapping ids can deadlock
+                ids = ", ".join(f"CAST(:id_{i} AS uuid)" for i in range(len(batch)))
+                await session.execute(
+                    text(f"SELECT 1 FROM complaints WHERE id IN ({ids}) ORDER BY id FOR UPDATE"),
+                    {name: value for name, value in params.items() if name.startswith("id_")}
+                )
+                await session.execute(
+                    text(f"""
+                    UPDATE complaints AS c
+                    SET view_count = COALESCE(c.view_count, 0) + v.delta
+                    FROM (VALUES {values}) AS v(id, delta)
+                    WHERE c.id = v.id
+                    """),
+                    params
+                )
+                await session.commit()
+        except Exception:
+            # Put the views back so the next flush retries them
+            for complaint_id, delta in batch.items():
+                self._pending[complaint_id] += delta
+                self._pending_total += delta
+            views_buffered.set(self._pending_total)
+            raise
+
+        view_flushes.inc()
+        return len(batch)
+
+    async def _run_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Warning: Could not flush view counts: {e}")
+
+    async def start(self):
+        """Start the periodic flush (called at application startup)."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_loop())
+
+    async def stop(self):
+        """Stop the periodic flush and write what is left (called at application shutdown)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            print(f"Warning: Could not flush view counts at shutdown: {e}")
+
+
+view_counter = ViewCountBuffer(
+    flush_interval=float(os.getenv("VIEW_COUNT_FLUSH_SECONDS", "5")),
+    max_pending=int(os.getenv("VIEW_COUNT_MAX_PENDING", "500")),
+)
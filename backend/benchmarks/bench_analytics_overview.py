@@ -0,0 +1,167 @@
+"""
+Benchmark the Pulse overview aggregates: five separate queries vs one grouped statement.
+
+Seeds synthetic complaints into a throwaway `bench_analytics` schema of the
+database in DATABASE_URL (pgvector must be installed), then times both
+implementations at 10k, 100k and 1M rows. The schema is dropped afterwards.
+
+Usage:
+    uv run python -m benchmarks.bench_analytics_overview [--sizes 10000,100000,1000000] [--runs 10]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, func, and_, desc, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.db import ASYNC_DATABASE_URL, Base, Complaint
+from app.pulse import aggregate_complaints, format_analytics_overview
+
+SCHEMA = "bench_analytics"
+DAYS = 30
+
+SEED_SQL = f"""
+INSERT INTO {SCHEMA}.complaints (id, original_text, title, category, urgency, status,
+                        planning_area, sentiment_score, keywords, created_at, updated_at)
+SELECT gen_random_uuid(),
+       'Benchmark complaint',
+       'Benchmark complaint',
+       (ARRAY['transport','housing','healthcare','environment','education','employment','security','general'])[1 + floor(random() * 8)::int],
+       (ARRAY['low','medium','high'])[1 + floor(random() * 3)::int],
+       'open',
+       CASE WHEN random() < 0.9
+            THEN (ARRAY['Bedok','Tampines','Bishan','Woodlands','Yishun','Jurong East','Clementi','Orchard','Punggol','Sengkang'])[1 + floor(random() * 10)::int]
+       END,
+       random() * 2 - 1,
+       ARRAY['benchmark'],
+       now() - random() * interval '90 days',
+       now()
+FROM generate_series(1, :count)
+"""
+
+
+async def assert_bench_tables(conn):
+    """Refuse to seed unless the tables really are in the bench schema (never the app's)."""
+    result = await conn.execute(
+        text("SELECT table_name FROM information_schema.tables WHERE table_schema = :schema"),
+        {"schema": SCHEMA}
+    )
+    missing = {table.name for table in Base.metadata.sorted_tables} - {row[0] for row in result}
+    if missing:
+        raise RuntimeError(f"Tables missing from schema {SCHEMA}: {', '.join(sorted(missing))}")
+
+
+async def legacy_overview(session, days: int):
+    """The original five-query implementation of /pulse/analytics/overview."""
+    start_date = datetime.utcnow() - timedelta(days=days)
+
+    total_complaints = (await session.execute(
+        select(func.count(Complaint.id)).where(Complaint.created_at >= start_date)
+    )).scalar()
+
+    category_result = await session.execute(
+        select(Complaint.category, func.count(Complaint.id))
+        .where(Complaint.created_at >= start_date)
+        .group_by(Complaint.category)
+        .order_by(desc(func.count(Complaint.id)))
+    )
+    category_breakdown = {row[0]: row[1] for row in category_result}
+
+    location_result = await session.execute(
+        select(Complaint.planning_area, func.count(Complaint.id))
+        .where(and_(Complaint.created_at >= start_date, Complaint.planning_area.isnot(None)))
+        .group_by(Complaint.planning_area)
+        .order_by(desc(func.count(Complaint.id)))
+        .limit(10)
+    )
+    location_breakdown = {row[0]: row[1] for row in location_result}
+
+    avg_sentiment = (await session.execute(
+        select(func.avg(Complaint.sentiment_score))
+        .where(and_(Complaint.created_at >= start_date, Complaint.sentiment_score.isnot(None)))
+    )).scalar() or 0.0
+
+    daily_result = await session.execute(
+        text("""
+        SELECT DATE(created_at) as date, COUNT(*) as count
+        FROM complaints
+        WHERE created_at >= :start_date
+        GROUP BY DATE(created_at)
+        ORDER BY date
+        """),
+        {"start_date": start_date}
+    )
+    daily_trend = [{"date": row[0].isoformat(), "count": row[1]} for row in daily_result]
+
+    return {
+        "total_complaints": total_complaints,
+        "category_breakdown": category_breakdown,
+        "location_breakdown": location_breakdown,
+        "average_sentiment": round(avg_sentiment, 2),
+        "daily_trend": daily_trend,
+        "period_days": days
+    }
+
+
+async def grouped_overview(session, days: int):
+    """The single-statement GROUPING SETS implementation."""
+    start_date = datetime.utcnow() - timedelta(days=days)
+    return format_analytics_overview(await aggregate_complaints(session, start_date), days)
+
+
+async def time_it(session_maker, fn, runs: int) -> float:
+    """Median wall time in milliseconds over `runs` calls (after one warm-up)."""
+    async with session_maker() as session:
+        await fn(session, DAYS)
+        samples = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            await fn(session, DAYS)
+            samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+async def main(sizes, runs):
+    engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        connect_args={"server_settings": {"search_path": f"{SCHEMA},public"}},
+    )
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        # Create the tables in the bench schema; with the search_path alone,
+        # create_all would see the app's public tables and skip them
+        bench_conn = await conn.execution_options(schema_translate_map={None: SCHEMA})
+        await bench_conn.run_sync(Base.metadata.create_all)
+        await assert_bench_tables(conn)
+
+    try:
+        seeded = 0
+        print(f"{'rows':>10} {'legacy (ms)':>12} {'grouped (ms)':>13} {'speedup':>8}")
+        for size in sizes:
+            async with engine.begin() as conn:
+                await conn.execute(text(SEED_SQL), {"count": size - seeded})
+                await conn.execute(text(f"ANALYZE {SCHEMA}.complaints"))
+            seeded = size
+
+            legacy_ms = await time_it(session_maker, legacy_overview, runs)
+            grouped_ms = await time_it(session_maker, grouped_overview, runs)
+            print(f"{size:>10} {legacy_ms:>12.1f} {grouped_ms:>13.1f} {legacy_ms / grouped_ms:>7.1f}x")
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    asyncio.run(main(sorted(int(size) for size in args.sizes.split(",")), args.runs))
@@ -0,0 +1,108 @@
+"""
+Benchmark chat task registration: global asyncio.Lock vs lock-free get-or-create.
+
+Fires N simultaneous chat starts (broker create + task manager register, the
+hot path of POST /api/chat) and the matching stream attaches (broker ensure),
+once with every registration wrapped in one process-wide lock as before and
+once without. A broker round trip of --latency-ms is simulated to stand in
+for the Redis backend; pass --redis to use the real RedisTaskBroker at
+REDIS_URL instead.
+
+Usage:
+    uv run python -m benchmarks.bench_chat_start [--starts 1000] [--latency-ms 1] [--redis]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import uuid
+
+from app.task_broker import InMemoryTaskBroker, RedisTaskBroker, HAS_REDIS
+from app.task_manager import TaskManager
+
+
+class LatencyBroker(InMemoryTaskBroker):
+    """In-memory broker that pays a fixed round trip per registration call."""
+
+    def __init__(self, latency: float):
+        super().__init__()
+        self.latency = latency
+
+    async def create(self, task_id, metadata, policy=None):
+        await asyncio.sleep(self.latency)
+        await super().create(task_id, metadata, policy)
+
+    async def ensure(self, task_id):
+        await asyncio.sleep(self.latency)
+        await super().ensure(task_id)
+
+
+async def run(broker, starts: int, use_lock: bool):
+    """Start `starts` chats at once; returns (wall ms, per-start latencies in ms)."""
+    manager = TaskManager(broker, ttl_seconds=300, reap_interval=30, resume_grace_seconds=60)
+    lock = asyncio.Lock()
+    latencies = []
+
+    async def register(task_id):
+        await broker.create(task_id, {})
+        manager.register(task_id)
+        await broker.ensure(task_id)
+        manager.attach(task_id)
+
+    async def start_chat():
+        task_id = f"task_{uuid.uuid4().hex[:8]}"
+        started = time.perf_counter()
+        if use_lock:
+            async with lock:
+                await register(task_id)
+        else:
+            await register(task_id)
+        latencies.append((time.perf_counter() - started) * 1000)
+        return task_id
+
+    started = time.perf_counter()
+    task_ids = await asyncio.gather(*(start_chat() for _ in range(starts)))
+    wall_ms = (time.perf_counter() - started) * 1000
+
+    for task_id in task_ids:
+        await manager.detach(task_id, completed=True)
+    return wall_ms, latencies
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def main(starts: int, latency_ms: float, use_redis: bool):
+    if use_redis:
+        if not HAS_REDIS:
+            raise SystemExit("redis is not installed")
+        broker = RedisTaskBroker(os.getenv("REDIS_URL", "redis://localhost:6379/0"), prefix="bench_chat_task")
+        label = "redis"
+    else:
+        broker = LatencyBroker(latency_ms / 1000)
+        label = f"memory + {latency_ms}ms simulated round trip"
+
+    print(f"{starts} simultaneous chat starts ({label})")
+    print(f"{'mode':>10} {'wall (ms)':>10} {'p50 (ms)':>9} {'p99 (ms)':>9} {'starts/s':>9}")
+    try:
+        for mode, use_lock in (("lock", True), ("lock-free", False)):
+            wall_ms, latencies = await run(broker, starts, use_lock)
+            print(
+                f"{mode:>10} {wall_ms:>10.1f} {statistics.median(latencies):>9.2f} "
+                f"{percentile(latencies, 0.99):>9.2f} {starts / (wall_ms / 1000):>9.0f}"
+            )
+    finally:
+        await broker.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--starts", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=1.0)
+    parser.add_argument("--redis", action="store_true")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.starts, args.latency_ms, args.redis))
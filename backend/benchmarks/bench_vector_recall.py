@@ -0,0 +1,131 @@
+"""
+Benchmark similarity-search recall and latency: HNSW and IVFFlat vs exact search.
+
+Seeds clustered random vectors into a throwaway `bench_vectors` schema of the
+database in DATABASE_URL (pgvector must be installed), builds each index type
+the way app/vector_index.py does, and measures recall@k against an exact scan
+for every hnsw.ef_search / ivfflat.probes setting the recall targets map to.
+Use the results to tune HNSW_EF_SEARCH and IVFFLAT_PROBE_FRACTION. The schema
+is dropped afterwards.
+
+Usage:
+    uv run python -m benchmarks.bench_vector_recall [--rows 100000] [--dims 1536] [--queries 100] [--k 10]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db import ASYNC_DATABASE_URL
+from app.vector_index import (
+    VectorIndexManager, HNSW_EF_SEARCH, IVFFLAT_PROBE_FRACTION, hnsw_ef_search, ivfflat_lists, ivfflat_probes,
+)
+
+SCHEMA = "bench_vectors"
+CLUSTERS = 100
+
+SEED_SQL = """
+CREATE TABLE centers AS
+SELECT i AS id, ARRAY(SELECT random() - 0.5 + 0 * i FROM generate_series(1, :dims)) AS v
+FROM generate_series(1, :clusters) i;
+
+INSERT INTO complaints (embedding)
+SELECT ARRAY(SELECT c.v[d] + (random() - 0.5) * 0.3 + 0 * g FROM generate_series(1, :dims) d)::vector
+FROM generate_series(1, :rows) g
+JOIN centers c ON c.id = 1 + (g % :clusters);
+"""
+
+
+async def search(conn, setting, query_vector, k):
+    """Top-k ids and latency (ms) for one query, with `setting` applied via SET LOCAL."""
+    async with conn.begin():
+        if setting:
+            await conn.execute(text(setting))
+        started = time.perf_counter()
+        result = await conn.execute(
+            text("SELECT id FROM complaints ORDER BY embedding <=> CAST(:q AS vector) LIMIT :k"),
+            {"q": query_vector, "k": k},
+        )
+        ids = [row[0] for row in result]
+    return ids, (time.perf_counter() - started) * 1000
+
+
+async def measure(conn, setting, queries, truth, k):
+    """Mean recall@k and median latency over all queries."""
+    recalls, latencies = [], []
+    for query_vector, expected in zip(queries, truth):
+        ids, elapsed = await search(conn, setting, query_vector, k)
+        recalls.append(len(set(ids) & set(expected)) / k)
+        latencies.append(elapsed)
+    return statistics.mean(recalls), statistics.median(latencies)
+
+
+async def main(rows, dims, query_count, k):
+    engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        connect_args={"server_settings": {"search_path": f"{SCHEMA},public"}},
+    )
+
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        await conn.execute(text(f"CREATE TABLE complaints (id serial PRIMARY KEY, embedding vector({dims}))"))
+        for statement in SEED_SQL.strip().split(";\n\n"):
+            await conn.execute(text(statement), {"dims": dims, "rows": rows, "clusters": CLUSTERS})
+        await conn.execute(text("ANALYZE complaints"))
+
+    try:
+        async with engine.connect() as conn:
+            # Queries are perturbed copies of stored vectors
+            result = await conn.execute(text(f"""
+                SELECT ARRAY(SELECT x + (random() - 0.5) * 0.1 + 0 * id FROM unnest(embedding::real[]) x)::vector::text
+                FROM complaints ORDER BY random() LIMIT {query_count}
+            """))
+            queries = [row[0] for row in result]
+
+            truth, exact_latencies = [], []
+            for query_vector in queries:
+                ids, elapsed = await search(conn, "SET LOCAL enable_indexscan = off", query_vector, k)
+                truth.append(ids)
+                exact_latencies.append(elapsed)
+            print(f"{rows} rows x {dims} dims, {query_count} queries, recall@{k}")
+            print(f"{'index':>8} {'setting':>22} {'target':>7} {'recall':>7} {'p50 (ms)':>9}")
+            print(f"{'exact':>8} {'seq scan':>22} {'':>7} {1.0:>7.3f} {statistics.median(exact_latencies):>9.2f}")
+
+        for index_type in ("hnsw", "ivfflat"):
+            manager = VectorIndexManager(index_type, recall_target=0.95, check_interval=0)
+            lists = ivfflat_lists(rows) if index_type == "ivfflat" else None
+            async with engine.connect() as conn:
+                conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                await conn.execute(text("DROP INDEX IF EXISTS bench_embedding_index"))
+                started = time.perf_counter()
+                await conn.execute(text(manager._create_sql("bench_embedding_index", lists)))
+                print(f"-- {index_type} built in {time.perf_counter() - started:.1f}s" + (f" ({lists} lists)" if lists else ""))
+
+            async with engine.connect() as conn:
+                table = HNSW_EF_SEARCH if index_type == "hnsw" else IVFFLAT_PROBE_FRACTION
+                for target, _ in table:
+                    if index_type == "hnsw":
+                        setting = f"SET LOCAL hnsw.ef_search = {hnsw_ef_search(target)}"
+                    else:
+                        setting = f"SET LOCAL ivfflat.probes = {ivfflat_probes(lists, target)}"
+                    recall, latency = await measure(conn, setting, queries, truth, k)
+                    print(f"{index_type:>8} {setting.split(' ', 2)[2]:>22} {target:>7.2f} {recall:>7.3f} {latency:>9.2f}")
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--dims", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.rows, args.dims, args.queries, args.k))
@@ -0,0 +1,43 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.app import app, task_broker
+from app.task_broker import InMemoryTaskBroker, default_task_metadata
+
+
+async def publish_reply(broker, task_id):
+    await broker.create(task_id, default_task_metadata())
+    await broker.publish(task_id, "Hello")
+    await broker.publish(task_id, None)
+
+
+async def collect(broker, task_id, after=None):
+    return [event async for event in broker.subscribe(task_id, after=after)]
+
+
+def test_resume_after_last_event_ends_immediately():
+    async def run():
+        broker = InMemoryTaskBroker()
+        await publish_reply(broker, "task")
+        events = await collect(broker, "task")
+        assert events == [("1", "Hello"), ("2", None)]
+        # Resuming after the end id must not wait for events that never come
+        assert await asyncio.wait_for(collect(broker, "task", after="2"), 1) == [("2", None)]
+
+    asyncio.run(run())
+
+
+def test_stream_resume_after_last_event_sends_metadata_and_done():
+    asyncio.run(publish_reply(task_broker, "resume-task"))
+    client = TestClient(app)
+    response = client.get("/api/chat/stream/resume-task", headers={"Last-Event-ID": "2"})
+    assert response.status_code == 200
+    assert '"type":"metadata"' in response.text
+    assert '"done":true' in response.text
+
+
+def test_stream_resume_of_deleted_task_is_404():
+    client = TestClient(app)
+    response = client.get("/api/chat/stream/no-such-task", headers={"Last-Event-ID": "3"})
+    assert response.status_code == 404
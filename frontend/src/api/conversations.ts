@@ -97,6 +97,9 @@ export async function sendChatMessage(request: ChatRequest): Promise<ChatRespons
 }
 
 // Streaming complaint function - updated for new backend pattern
+// How many times a dropped chat stream is resumed before giving up
+const MAX_STREAM_RECONNECTS = 3
+
 export async function streamChatMessage(
   request: StreamingChatRequest & { conversationHistory?: Array<{role: string, content: string}>, threadMetadata?: any },
   onChunk: (content: string) => void,
@@ -139,58 +142,87 @@ export async function streamChatMessage(
 
     const { task_id } = await taskResponse.json()
 
-    // Step 2: Stream the results using Server-Sent Events
-    const streamResponse = await fetch(`${API_BASE_URL}/api/chat/stream/${task_id}`, {
-      headers: await getAuthHeaders()
-    })
-
-    if (!streamResponse.ok) {
-      throw new Error(`Failed to stream chat processing: ${streamResponse.status}`)
-    }
-
-    const reader = streamResponse.body?.getReader()
-    if (!reader) {
-      throw new Error('No response body available')
-    }
-
+    // Step 2: Stream the results using Server-Sent Events.
+    // If the connection drops mid-stream, reconnect with Last-Event-ID so the
+    // backend resumes the same response instead of starting a new one.
     const decoder = new TextDecoder()
     let fullResponse = ''
     let threadMetadata = null
+    let lastEventId: string | null = null
+    let reconnects = 0
 
     while (true) {
-      const { done, value } = await reader.read()
-      if (done) break
+      const headers: Record<string, string> = { ...(await getAuthHeaders()) }
+      if (lastEventId) {
+        headers['Last-Event-ID'] = lastEventId
+      }
 
-      const chunk = decoder.decode(value, { stream: true })
-      const lines = chunk.split('\n')
+      const streamResponse = await fetch(`${API_BASE_URL}/api/chat/stream/${task_id}`, {
+        headers
+      })
 
-      for (const line of lines) {
-        if (line.startsWith('data: ')) {
-          try {
-            const data = JSON.parse(line.slice(6))
+      if (!streamResponse.ok) {
+        // The task finished and was cleaned up while we were reconnecting
+        if (lastEventId && streamResponse.status === 404) break
+        throw new Error(`Failed to stream chat processing: ${streamResponse.status}`)
+      }
 
-            if (data.done) {
-              // Streaming complete
-              onComplete(fullResponse, request.conversation_id?.toString(), threadMetadata)
-              return
-            }
+      const reader = streamResponse.body?.getReader()
+      if (!reader) {
+        throw new Error('No response body available')
+      }
 
-            if (data.type === 'metadata') {
-              // Store metadata for later use
-              threadMetadata = data.threadMetaData
+      try {
+        while (true) {
+          const { done, value } = await reader.read()
+          if (done) break
+
+          const chunk = decoder.decode(value, { stream: true })
+          const lines = chunk.split('\n')
+
+          for (const line of lines) {
+            if (line.startsWith('id: ')) {
+              lastEventId = line.slice(4)
               continue
             }
-
-            if (data.content) {
-              fullResponse += data.content
-              onChunk(data.content)
+            if (line.startsWith('data: ')) {
+              try {
+                const data = JSON.parse(line.slice(6))
+
+                if (data.done) {
+                  // Streaming complete
+                  onComplete(fullResponse, request.conversation_id?.toString(), threadMetadata)
+                  return
+                }
+
+                if (data.type === 'metadata') {
+                  // Store metadata for later use
+                  threadMetadata = data.threadMetaData
+                  continue
+                }
+
+                if (data.content) {
+                  fullResponse += data.content
+                  onChunk(data.content)
+                }
+              } catch (parseError) {
+                // Skip malformed JSON lines
+                continue
+              }
             }
-          } catch (parseError) {
-            // Skip malformed JSON lines
-            continue
           }
         }
+        // Closed without a done event (e.g. by a proxy's idle timeout)
+        if (!lastEventId || reconnects >= MAX_STREAM_RECONNECTS) break
+      } catch (streamError) {
+        // Connection dropped
+        if (!lastEventId || reconnects >= MAX_STREAM_RECONNECTS) {
+          throw streamError
+        }
       }
+      // Resume after the last event we saw
+      reconnects += 1
+      await new Promise(resolve => setTimeout(resolve, 500 * reconnects))
     }
 
     // If we get here without seeing done:true, still complete